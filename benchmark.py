@@ -0,0 +1,251 @@
+"""Headless benchmarks for the overlay, picking, persistence and the palette grid.
+
+Runs under the offscreen Qt platform with a fake screen, so it needs no
+display and gives repeatable numbers:
+
+    python benchmark.py --sizes 100 10000 100000 --output results.json
+
+For each palette size it times:
+
+- startup: constructing and showing the main window, and until the saved
+  palette has finished loading
+- overlay_tick: one overlay sample (capture, nearest saved color, label
+  update) including the repaint it causes
+- pick_to_visible: from a pick request until the new color is in the grid
+  and the grid has repainted
+- save_color: ColorPickerApp.saveColor for an existing color
+- refresh_grid: ColorPickerApp.refreshGrid until the palette is reloaded
+
+Results are written as JSON, with timings in milliseconds, so runs on
+different commits can be compared.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtCore import QT_VERSION_STR, PYQT_VERSION_STR
+from PyQt5.QtGui import QCursor, QImage, QPixmap
+from PyQt5.QtWidgets import QApplication
+
+import main
+import palette_store
+
+
+DEFAULT_SIZES = (100, 10000, 100000)
+DEFAULT_TICKS = 500
+DEFAULT_PICKS = 100
+DEFAULT_SAVES = 200
+SEED = 1234
+
+
+class FakeScreenCapture(main.ScreenCapture):
+    """ScreenCapture reading from a generated image instead of the screen."""
+
+    def __init__(self, width, height, radius=0):
+        super().__init__(radius)
+        image = QImage(width, height, QImage.Format_RGB32)
+        for y in range(height):
+            for x in range(width):
+                # Distinct colors across the whole image
+                image.setPixel(x, y, 0xFF000000 | ((x * 7) & 0xFF) << 16 | ((y * 5) & 0xFF) << 8 | ((x + y) & 0xFF))
+        self.image = image
+        self.pixmap = QPixmap.fromImage(image)
+
+    def grab_pixmap(self, screen, x, y, width, height):
+        return self.pixmap.copy(x, y, width, height)
+
+    def color_at(self, x, y):
+        return self.image.pixel(x, y) & 0xFFFFFF
+
+
+def milliseconds(seconds):
+    return round(seconds * 1000, 4)
+
+
+def summarize(samples):
+    """Summary statistics of a list of durations in seconds, in milliseconds."""
+    ordered = sorted(samples)
+    if not ordered:
+        return {"count": 0}
+
+    def percentile(q):
+        return milliseconds(ordered[min(int(q * len(ordered)), len(ordered) - 1)])
+
+    return {
+        "count": len(ordered),
+        "mean": milliseconds(sum(ordered) / len(ordered)),
+        "p50": percentile(0.50),
+        "p95": percentile(0.95),
+        "p99": percentile(0.99),
+        "max": milliseconds(ordered[-1]),
+    }
+
+
+def fill_database(path, count, rng):
+    """Create a palette database holding count random colors."""
+    conn = palette_store.connect(path)
+    colors = rng.sample(range(1 << 24), count)
+    with conn:
+        conn.executemany(palette_store.UPSERT_SQL, [
+            (rgb >> 16, (rgb >> 8) & 0xFF, rgb & 0xFF, rgb, number)
+            for number, rgb in enumerate(colors)
+        ])
+    conn.close()
+
+
+def wait_until(app, condition, timeout=120.0):
+    """Process events until condition() is true."""
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("Benchmark step did not finish in time")
+        app.processEvents()
+
+
+def bench_startup(app):
+    started = time.perf_counter()
+    window = main.ColorPickerApp()
+    window.show()
+    app.processEvents()
+    shown = time.perf_counter()
+    wait_until(app, lambda: not window.isLoadingPalette())
+    loaded = time.perf_counter()
+    return window, {"window_shown": milliseconds(shown - started), "palette_loaded": milliseconds(loaded - started)}
+
+
+def bench_overlay_tick(app, window, screen_capture, ticks, rng):
+    overlay = window.ensureOverlay()
+    overlay.capture = screen_capture
+    overlay.setGeometry(app.primaryScreen().geometry())
+    overlay.show()
+    overlay.start_overlay()
+    overlay.scheduler.stop()  # Ticks are driven by the benchmark
+    geometry = app.primaryScreen().geometry()
+    samples = []
+    for _ in range(ticks):
+        QCursor.setPos(rng.randrange(geometry.width()), rng.randrange(geometry.height()))
+        start = time.perf_counter()
+        overlay.update_color()
+        app.processEvents()
+        samples.append(time.perf_counter() - start)
+    overlay.stop_overlay()
+    return summarize(samples)
+
+
+def bench_pick_to_visible(app, window, screen_capture, picks, rng):
+    window.capture_worker.capture = screen_capture
+    geometry = app.primaryScreen().geometry()
+    samples = []
+    for _ in range(picks):
+        while True:
+            x, y = rng.randrange(geometry.width()), rng.randrange(geometry.height())
+            rgb = screen_capture.color_at(x, y)
+            if not window.paletteModel.hasColor(rgb):
+                break
+        start = time.perf_counter()
+        window.capture_worker.request_pick(x, y)
+        wait_until(app, lambda: window.paletteModel.hasColor(rgb))
+        app.processEvents()  # Repaint the grid
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def bench_save_color(window, saves, rng):
+    colors = window.paletteModel.colors
+    samples = []
+    for _ in range(saves):
+        red, green, blue = palette_store.unpack_rgb(colors[rng.randrange(len(colors))])
+        start = time.perf_counter()
+        window.saveColor(red, green, blue)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def bench_refresh_grid(app, window):
+    start = time.perf_counter()
+    window.refreshGrid()
+    wait_until(app, lambda: not window.isLoadingPalette())
+    return milliseconds(time.perf_counter() - start)
+
+
+def run_size(app, size, args):
+    rng = random.Random(SEED + size)
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)  # ColorPickerApp opens colors.db in the working directory
+        try:
+            fill_database(palette_store.DATABASE_PATH, size, rng)
+            geometry = app.primaryScreen().geometry()
+            screen_capture = FakeScreenCapture(geometry.width(), geometry.height())
+            window, startup = bench_startup(app)
+            try:
+                results = {"startup": startup}
+                results["overlay_tick"] = bench_overlay_tick(app, window, screen_capture, args.ticks, rng)
+                results["pick_to_visible"] = bench_pick_to_visible(app, window, screen_capture, args.picks, rng)
+                results["save_color"] = bench_save_color(window, args.saves, rng)
+                results["refresh_grid"] = bench_refresh_grid(app, window)
+            finally:
+                window.closeDatabase()
+                if window.overlay is not None:
+                    window.overlay.close()
+                window.trayIcon.hide()
+                window.close()
+                window.deleteLater()
+                app.processEvents()
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main_benchmark(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="palette sizes to test")
+    parser.add_argument("--ticks", type=int, default=DEFAULT_TICKS, help="overlay samples per size")
+    parser.add_argument("--picks", type=int, default=DEFAULT_PICKS, help="picks per size")
+    parser.add_argument("--saves", type=int, default=DEFAULT_SAVES, help="saveColor calls per size")
+    parser.add_argument("--output", help="write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    report = {
+        "revision": git_revision(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "qt": QT_VERSION_STR,
+        "pyqt": PYQT_VERSION_STR,
+        "platform": QApplication.platformName(),
+        "sizes": {},
+    }
+    for size in args.sizes:
+        print(f"Benchmarking palette of {size} colors...", file=sys.stderr)
+        report["sizes"][str(size)] = run_size(app, size, args)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as stream:
+            stream.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_benchmark())
@@ -0,0 +1,304 @@
+"""Headless command line interface for scripting the color picker.
+
+    python color_cli.py list [--format hex|rgb|csv|hsl|hsv|cmyk|lab|oklch]
+    python color_cli.py add "#FF8800" 12,34,56
+    python color_cli.py remove "#FF8800"
+    python color_cli.py sample screenshot.png 10,20 30,40
+    python color_cli.py export palette.gpl
+    python color_cli.py compact --threshold 2.3 --dry-run
+    python color_cli.py probe 10,20 30,40
+    python color_cli.py monitor 10,20 30,40 --rate 10 --output drift.ndjson
+
+`python main.py <command> ...` does the same. "probe" asks the sampling
+service of a running instance for the colors on screen; "monitor" logs the
+colors at fixed points until interrupted. No tray icon, window or overlay
+is created, and each command imports only the modules it needs (Qt is only
+loaded by "sample", to decode the image, and by "monitor"), so a call starts
+in a few tens of milliseconds. Defaults come from the modules the GUI uses,
+so both stay in step.
+"""
+import argparse
+import sys
+
+import monitor_log
+import palette_compact
+import palette_io
+import palette_store
+
+
+COMMANDS = ("list", "add", "remove", "sample", "export", "compact", "probe", "monitor")
+# "rgb" and "csv" are the plain listings; the rest come from color_formats
+LIST_FORMATS = ("hex", "rgb", "csv", "hsl", "hsv", "cmyk", "lab", "oklch")
+
+
+def is_command_line(argv):
+    """Whether arguments ask for a command rather than the GUI."""
+    return any(arg in COMMANDS or arg in ("-h", "--help") for arg in argv)
+
+
+def parse_color(text):
+    """Parse a hex color as palette_io.parse_hex does, or "r,g,b", into a packed color."""
+    if "," in text:
+        parts = text.split(",")
+        if len(parts) != 3:
+            raise argparse.ArgumentTypeError(f"Expected r,g,b: {text!r}")
+        try:
+            red, green, blue = (int(part) for part in parts)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Expected r,g,b: {text!r}")
+        if not all(0 <= value <= 255 for value in (red, green, blue)):
+            raise argparse.ArgumentTypeError(f"Channel out of range: {text!r}")
+        return palette_store.pack_rgb(red, green, blue)
+    try:
+        return palette_io.parse_hex(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Not a color: {text!r}")
+
+
+def parse_point(text):
+    """Parse "x,y" into a pair of pixel coordinates."""
+    try:
+        x, y = (int(part) for part in text.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected x,y: {text!r}")
+    return x, y
+
+
+def positive_float(text):
+    """Parse a finite number greater than zero, such as a sampling rate."""
+    try:
+        value = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected a number: {text!r}")
+    if not 0 < value < float("inf"):
+        raise argparse.ArgumentTypeError(f"Expected a number above zero: {text!r}")
+    return value
+
+
+def format_color(rgb, style):
+    red, green, blue = palette_store.unpack_rgb(rgb)
+    if style == "rgb":
+        return f"{red} {green} {blue}"
+    if style == "csv":
+        return f"#{rgb:06X},{red},{green},{blue}"
+    if style != "hex":
+        import color_formats
+        return color_formats.format_color(rgb, style)
+    return f"#{rgb:06X}"
+
+
+def format_colors(rgbs, style):
+    """Format many colors, converting them in one NumPy pass when available."""
+    if style in ("hex", "rgb", "csv"):
+        return [format_color(rgb, style) for rgb in rgbs]
+    import color_formats
+    if color_formats.np is None:
+        return [color_formats.format_color(rgb, style) for rgb in rgbs]
+    return color_formats.format_colors_array(rgbs, style)
+
+
+def list_colors(args):
+    conn = palette_store.connect(args.db)
+    try:
+        if args.format == "csv":
+            print("hex,red,green,blue")
+        if args.format in ("hex", "rgb", "csv"):
+            for (rgb,) in conn.execute(f"SELECT rgb FROM colors {palette_store.ORDER_BY}"):
+                print(format_color(rgb, args.format))
+        else:
+            rgbs = [rgb for (rgb,) in conn.execute(f"SELECT rgb FROM colors {palette_store.ORDER_BY}")]
+            for text in format_colors(rgbs, args.format):
+                print(text)
+    finally:
+        conn.close()
+    return 0
+
+
+def add_colors(args):
+    conn = palette_store.connect(args.db)
+    try:
+        with conn:
+            for rgb in args.colors:
+                palette_store.save_color(conn.cursor(), *palette_store.unpack_rgb(rgb))
+    finally:
+        conn.close()
+    return 0
+
+
+def remove_colors(args):
+    conn = palette_store.connect(args.db)
+    try:
+        with conn:
+            conn.executemany("DELETE FROM colors WHERE rgb=?", [(rgb,) for rgb in args.colors])
+    finally:
+        conn.close()
+    return 0
+
+
+def sample_colors(args):
+    from PyQt5.QtGui import QImage
+    image = QImage(args.image)
+    if image.isNull():
+        raise ValueError(f"Cannot read image: {args.image}")
+    width, height = image.width(), image.height()
+    for x, y in args.points:
+        if not (0 <= x < width and 0 <= y < height):
+            raise ValueError(f"Point {x},{y} is outside the {width}x{height} image")
+    colors = [image.pixel(x, y) & 0xFFFFFF for x, y in args.points]
+    for (x, y), text in zip(args.points, format_colors(colors, args.format)):
+        print(f"{x},{y}\t{text}")
+    if args.save:
+        conn = palette_store.connect(args.db)
+        try:
+            with conn:
+                for rgb in colors:
+                    palette_store.save_color(conn.cursor(), *palette_store.unpack_rgb(rgb))
+        finally:
+            conn.close()
+    return 0
+
+
+def export_colors(args):
+    conn = palette_store.connect(args.db)
+    try:
+        count = palette_io.export_palette(conn, args.path, args.format)
+    finally:
+        conn.close()
+    print(f"Exported {count} colors to {args.path}")
+    return 0
+
+
+def compact_colors(args):
+    conn = palette_store.connect(args.db)
+    try:
+        merges = palette_compact.plan_compaction(conn, args.threshold)
+        for rgb, merged in merges.items():
+            print(palette_compact.describe(rgb, merged))
+        count = palette_compact.merged_count(merges)
+        if args.dry_run:
+            print(f"Would merge {count} colors into {len(merges)}")
+        else:
+            palette_compact.apply_compaction(conn, merges)
+            print(f"Merged {count} colors into {len(merges)}")
+    finally:
+        conn.close()
+    return 0
+
+
+def probe_colors(args):
+    import sample_client
+    try:
+        client = sample_client.SampleClient()
+    except OSError as e:
+        raise RuntimeError(
+            f"No sampling service is running ({e}); enable it from the tray menu "
+            f"or start the app with {sample_client.SERVICE_ENV}=1")
+    with client:
+        response = client.request({"op": "sample_many", "points": args.points})
+    if not response["ok"]:
+        raise RuntimeError(response["error"])
+    for (x, y), color in zip(args.points, response["colors"]):
+        if color is None:
+            print(f"{x},{y}\toff-screen")
+        else:
+            print(f"{x},{y}\t{format_color(int(color[1:], 16), args.format)}")
+    return 0
+
+
+def monitor_colors(args):
+    import signal
+    from PyQt5.QtCore import QTimer
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication(sys.argv[:1])
+    from screen_capture import ScreenMonitor  # Screen capture; needs the application first
+    log = monitor_log.SampleLog(args.output, args.points, args.format,
+                                max_bytes=args.max_bytes, backup_count=args.backups)
+    monitor = ScreenMonitor(args.points, args.rate, log)
+    # Let Python see Ctrl+C while the Qt event loop runs
+    signal.signal(signal.SIGINT, lambda *_: app.quit())
+    wakeup = QTimer()
+    wakeup.timeout.connect(lambda: None)
+    wakeup.start(200)
+    if args.duration:
+        QTimer.singleShot(int(args.duration * 1000), app.quit)
+    monitor.start()
+    try:
+        app.exec_()
+    finally:
+        monitor.stop()
+        log.close()
+    print(f"Logged {monitor.ticks} samples of {len(args.points)} points to {args.output}")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="color_picker", description="Manage the saved palette without starting the GUI.")
+    parser.add_argument("--db", default=palette_store.DATABASE_PATH,
+                        help="palette database (default: %(default)s)")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+    commands.required = True
+
+    listing = commands.add_parser("list", help="print the saved colors, oldest first")
+    listing.add_argument("--format", choices=LIST_FORMATS, default="hex")
+    listing.set_defaults(run=list_colors)
+
+    add = commands.add_parser("add", help="save colors, or move existing ones to the end")
+    add.add_argument("colors", nargs="+", type=parse_color, metavar="color",
+                     help='"#RRGGBB", "#RGB" or r,g,b')
+    add.set_defaults(run=add_colors)
+
+    remove = commands.add_parser("remove", help="delete saved colors")
+    remove.add_argument("colors", nargs="+", type=parse_color, metavar="color")
+    remove.set_defaults(run=remove_colors)
+
+    sample = commands.add_parser("sample", help="print the colors of image pixels")
+    sample.add_argument("image")
+    sample.add_argument("points", nargs="+", type=parse_point, metavar="x,y")
+    sample.add_argument("--format", choices=LIST_FORMATS, default="hex")
+    sample.add_argument("--save", action="store_true", help="also save the sampled colors")
+    sample.set_defaults(run=sample_colors)
+
+    export = commands.add_parser("export", help="write the palette to a .gpl/.ase/.css/.json/.csv file")
+    export.add_argument("path")
+    export.add_argument("--format", choices=("gpl", "ase", "css", "json", "csv"),
+                        help="file format (default: from the extension)")
+    export.set_defaults(run=export_colors)
+
+    compact = commands.add_parser("compact", help="merge near-duplicate colors into the most recently used one")
+    compact.add_argument("--threshold", type=float, default=palette_compact.DEFAULT_THRESHOLD,
+                         help="largest \u0394E merged (default: %(default)s)")
+    compact.add_argument("--dry-run", action="store_true", help="only list the merges")
+    compact.set_defaults(run=compact_colors)
+
+    probe = commands.add_parser("probe", help="print the screen colors at points, from the running app")
+    probe.add_argument("points", nargs="+", type=parse_point, metavar="x,y")
+    probe.add_argument("--format", choices=LIST_FORMATS, default="hex")
+    probe.set_defaults(run=probe_colors)
+
+    monitor = commands.add_parser("monitor", help="log the screen colors at points until interrupted")
+    monitor.add_argument("points", nargs="+", type=parse_point, metavar="x,y")
+    monitor.add_argument("--rate", type=positive_float, default=1.0, help="samples per second (default: %(default)s)")
+    monitor.add_argument("--output", required=True, help="sample file; .csv for CSV, otherwise NDJSON")
+    monitor.add_argument("--format", choices=("ndjson", "csv"), help="file format (default: from the extension)")
+    monitor.add_argument("--duration", type=positive_float, help="stop after this many seconds")
+    monitor.add_argument("--max-bytes", type=int, default=monitor_log.MONITOR_MAX_BYTES,
+                         help="rotate the file at this size (default: %(default)s)")
+    monitor.add_argument("--backups", type=int, default=monitor_log.MONITOR_BACKUP_COUNT,
+                         help="rotated files to keep (default: %(default)s)")
+    monitor.set_defaults(run=monitor_colors)
+    return parser
+
+
+def main(argv=None):
+    """Run one command; return the process exit status."""
+    args = build_parser().parse_args(argv)
+    try:
+        return args.run(args)
+    except Exception as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
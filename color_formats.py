@@ -0,0 +1,250 @@
+"""Color readouts in the formats designers work with.
+
+Formats: hex, rgb, hsl, hsv, cmyk, lab (CIE L*a*b*, D65) and oklch.
+
+format_color() returns the display text for one packed 0xRRGGBB color and
+memoizes it, so the overlay and the palette grid only ever convert a color
+once per format. format_colors_array() converts a whole array of colors
+with NumPy in one pass, for bulk listings and exports. Both share the
+precomputed sRGB -> linear table from color_space.
+"""
+import math
+
+from color_space import SRGB_TO_LINEAR, WHITE_X, WHITE_Y, WHITE_Z, LAB_EPSILON, LAB_KAPPA, rgb_to_lab
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only the array conversions need it
+    np = None
+
+
+FORMAT_NAMES = ("hex", "rgb", "hsl", "hsv", "cmyk", "lab", "oklch")
+CACHE_LIMIT = 65536  # Memoized strings kept per format before the cache is cleared
+
+# Linear sRGB -> LMS and LMS' -> Oklab (Björn Ottosson)
+OKLAB_M1 = (
+    (0.4122214708, 0.5363325363, 0.0514459929),
+    (0.2119034982, 0.6806995451, 0.1073969566),
+    (0.0883024619, 0.2817188376, 0.6299787005),
+)
+OKLAB_M2 = (
+    (0.2104542553, 0.7936177850, -0.0040720468),
+    (1.9779984951, -2.4285922050, 0.4505937099),
+    (0.0259040371, 0.7827717662, -0.8086757660),
+)
+ACHROMATIC_CHROMA = 1e-4  # Below this Oklch chroma the hue is meaningless and shown as 0
+
+
+# Component conversions for a single packed color
+
+def rgb_to_hsv(rgb):
+    """Return (hue degrees, saturation 0-1, value 0-1)."""
+    r, g, b = ((rgb >> 16) & 0xFF) / 255.0, ((rgb >> 8) & 0xFF) / 255.0, (rgb & 0xFF) / 255.0
+    high, low = max(r, g, b), min(r, g, b)
+    chroma = high - low
+    return hue(r, g, b, high, chroma), (chroma / high if high else 0.0), high
+
+
+def rgb_to_hsl(rgb):
+    """Return (hue degrees, saturation 0-1, lightness 0-1)."""
+    r, g, b = ((rgb >> 16) & 0xFF) / 255.0, ((rgb >> 8) & 0xFF) / 255.0, (rgb & 0xFF) / 255.0
+    high, low = max(r, g, b), min(r, g, b)
+    chroma = high - low
+    lightness = (high + low) / 2
+    if chroma == 0:
+        saturation = 0.0
+    else:
+        saturation = chroma / (1 - abs(2 * lightness - 1))
+    return hue(r, g, b, high, chroma), saturation, lightness
+
+
+def hue(r, g, b, high, chroma):
+    """Hue angle shared by HSL and HSV."""
+    if chroma == 0:
+        return 0.0
+    if high == r:
+        h = ((g - b) / chroma) % 6
+    elif high == g:
+        h = (b - r) / chroma + 2
+    else:
+        h = (r - g) / chroma + 4
+    return h * 60.0
+
+
+def rgb_to_cmyk(rgb):
+    """Return naive (cyan, magenta, yellow, key) fractions 0-1."""
+    r, g, b = ((rgb >> 16) & 0xFF) / 255.0, ((rgb >> 8) & 0xFF) / 255.0, (rgb & 0xFF) / 255.0
+    high = max(r, g, b)
+    if high == 0:
+        return 0.0, 0.0, 0.0, 1.0
+    return (high - r) / high, (high - g) / high, (high - b) / high, 1 - high
+
+
+def rgb_to_oklab(rgb):
+    """Return Oklab (L 0-1, a, b)."""
+    linear = (
+        SRGB_TO_LINEAR[(rgb >> 16) & 0xFF],
+        SRGB_TO_LINEAR[(rgb >> 8) & 0xFF],
+        SRGB_TO_LINEAR[rgb & 0xFF],
+    )
+    lms = [sum(m * c for m, c in zip(row, linear)) ** (1 / 3) for row in OKLAB_M1]
+    return tuple(sum(m * c for m, c in zip(row, lms)) for row in OKLAB_M2)
+
+
+def rgb_to_oklch(rgb):
+    """Return Oklch (L 0-1, chroma, hue degrees)."""
+    l, a, b = rgb_to_oklab(rgb)
+    chroma = math.hypot(a, b)
+    if chroma < ACHROMATIC_CHROMA:
+        return l, 0.0, 0.0
+    return l, chroma, math.degrees(math.atan2(b, a)) % 360
+
+
+# Text formatting
+
+def text_hex(rgb):
+    return f"#{rgb:06X}"
+
+
+def text_rgb(rgb):
+    return f"rgb({(rgb >> 16) & 0xFF}, {(rgb >> 8) & 0xFF}, {rgb & 0xFF})"
+
+
+def text_hsl(rgb):
+    h, s, l = rgb_to_hsl(rgb)
+    return f"hsl({h:.0f}, {s * 100:.0f}%, {l * 100:.0f}%)"
+
+
+def text_hsv(rgb):
+    h, s, v = rgb_to_hsv(rgb)
+    return f"hsv({h:.0f}, {s * 100:.0f}%, {v * 100:.0f}%)"
+
+
+def text_cmyk(rgb):
+    c, m, y, k = rgb_to_cmyk(rgb)
+    return f"cmyk({c * 100:.0f}%, {m * 100:.0f}%, {y * 100:.0f}%, {k * 100:.0f}%)"
+
+
+def text_lab(rgb):
+    l, a, b = rgb_to_lab(rgb)
+    return f"lab({l:.1f} {a:.1f} {b:.1f})"
+
+
+def text_oklch(rgb):
+    l, c, h = rgb_to_oklch(rgb)
+    return f"oklch({l * 100:.1f}% {c:.3f} {h:.1f})"
+
+
+FORMATTERS = {
+    "hex": text_hex, "rgb": text_rgb, "hsl": text_hsl, "hsv": text_hsv,
+    "cmyk": text_cmyk, "lab": text_lab, "oklch": text_oklch,
+}
+_cache = {name: {} for name in FORMAT_NAMES}
+
+
+def format_color(rgb, fmt="hex"):
+    """Return the memoized text of a packed color in one format."""
+    cache = _cache[fmt]
+    text = cache.get(rgb)
+    if text is None:
+        if len(cache) >= CACHE_LIMIT:
+            cache.clear()
+        text = cache[rgb] = FORMATTERS[fmt](rgb)
+    return text
+
+
+def format_lines(rgb, formats):
+    """Return the texts of a packed color in several formats, one per line."""
+    return "\n".join(format_color(rgb, fmt) for fmt in formats)
+
+
+# Array conversions
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy is required for array color conversions (pip install numpy)")
+
+
+def convert_array(rgbs, fmt):
+    """Convert an array of packed colors to an (n, k) float array of components.
+
+    Components are in the units of the single-color functions: hsl/hsv
+    (degrees, 0-1, 0-1), cmyk (0-1 each), lab (L*, a*, b*), oklch
+    (L 0-1, chroma, degrees) and rgb (0-255 each).
+    """
+    require_numpy()
+    rgbs = np.asarray(rgbs, dtype=np.int64)
+    channels = np.stack([(rgbs >> 16) & 0xFF, (rgbs >> 8) & 0xFF, rgbs & 0xFF], axis=-1)
+    if fmt in ("hex", "rgb"):
+        return channels.astype(np.float64)
+    if fmt in ("lab", "oklch"):
+        linear = np.asarray(SRGB_TO_LINEAR)[channels]
+        if fmt == "lab":
+            return lab_array(linear)
+        return oklch_array(linear)
+
+    unit = channels / 255.0
+    high = unit.max(axis=-1)
+    low = unit.min(axis=-1)
+    chroma = high - low
+    if fmt == "cmyk":
+        safe = np.where(high > 0, high, 1.0)
+        cmy = (high[..., None] - unit) / safe[..., None]
+        return np.concatenate([cmy, (1 - high)[..., None]], axis=-1)
+    angle = hue_array(unit, high, chroma)
+    if fmt == "hsv":
+        saturation = np.divide(chroma, high, out=np.zeros_like(chroma), where=high > 0)
+        return np.stack([angle, saturation, high], axis=-1)
+    if fmt == "hsl":
+        lightness = (high + low) / 2
+        denominator = 1 - np.abs(2 * lightness - 1)
+        saturation = np.divide(chroma, denominator, out=np.zeros_like(chroma), where=chroma > 0)
+        return np.stack([angle, saturation, lightness], axis=-1)
+    raise ValueError(f"Unknown color format: {fmt}")
+
+
+def hue_array(unit, high, chroma):
+    """Hue angles in degrees for an (..., 3) array of 0-1 channels."""
+    r, g, b = unit[..., 0], unit[..., 1], unit[..., 2]
+    safe = np.where(chroma > 0, chroma, 1.0)
+    h = np.where(high == r, ((g - b) / safe) % 6,
+                 np.where(high == g, (b - r) / safe + 2, (r - g) / safe + 4))
+    return np.where(chroma > 0, h * 60.0, 0.0)
+
+
+def lab_array(linear):
+    """CIE L*a*b* (D65) for an (..., 3) array of linear channels."""
+    matrix = np.array([
+        [0.4124564 / WHITE_X, 0.3575761 / WHITE_X, 0.1804375 / WHITE_X],
+        [0.2126729 / WHITE_Y, 0.7151522 / WHITE_Y, 0.0721750 / WHITE_Y],
+        [0.0193339 / WHITE_Z, 0.1191920 / WHITE_Z, 0.9503041 / WHITE_Z],
+    ])
+    xyz = linear @ matrix.T
+    f = np.where(xyz > LAB_EPSILON, np.cbrt(xyz), (LAB_KAPPA * xyz + 16) / 116)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+def oklch_array(linear):
+    """Oklch for an (..., 3) array of linear channels."""
+    lms = np.cbrt(linear @ np.array(OKLAB_M1).T)
+    l, a, b = np.moveaxis(lms @ np.array(OKLAB_M2).T, -1, 0)
+    chroma = np.hypot(a, b)
+    angle = np.degrees(np.arctan2(b, a)) % 360
+    achromatic = chroma < ACHROMATIC_CHROMA
+    return np.stack([l, np.where(achromatic, 0.0, chroma), np.where(achromatic, 0.0, angle)], axis=-1)
+
+
+def format_colors_array(rgbs, fmt):
+    """Return the texts of many packed colors, converted in one vectorized pass."""
+    if fmt == "hex":
+        return [f"#{int(rgb):06X}" for rgb in rgbs]
+    values = convert_array(rgbs, fmt).tolist()
+    if fmt == "rgb":
+        return [f"rgb({r:.0f}, {g:.0f}, {b:.0f})" for r, g, b in values]
+    if fmt in ("hsl", "hsv"):
+        return [f"{fmt}({h:.0f}, {s * 100:.0f}%, {v * 100:.0f}%)" for h, s, v in values]
+    if fmt == "cmyk":
+        return [f"cmyk({c * 100:.0f}%, {m * 100:.0f}%, {y * 100:.0f}%, {k * 100:.0f}%)" for c, m, y, k in values]
+    if fmt == "lab":
+        return [f"lab({l:.1f} {a:.1f} {b:.1f})" for l, a, b in values]
+    return [f"oklch({l * 100:.1f}% {c:.3f} {h:.1f})" for l, c, h in values]
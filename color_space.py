@@ -0,0 +1,77 @@
+"""Color space conversions and perceptual distances.
+
+Colors are passed around as packed 24-bit 0xRRGGBB integers.
+"""
+import math
+
+
+# sRGB channel value -> linear light, precomputed for all 256 values
+SRGB_TO_LINEAR = [
+    c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+    for c in (v / 255.0 for v in range(256))
+]
+
+# D65 reference white
+WHITE_X = 0.95047
+WHITE_Y = 1.0
+WHITE_Z = 1.08883
+
+LAB_EPSILON = 216 / 24389
+LAB_KAPPA = 24389 / 27
+
+
+def lab_f(t):
+    """CIE Lab companding function."""
+    if t > LAB_EPSILON:
+        return t ** (1.0 / 3.0)
+    return (LAB_KAPPA * t + 16) / 116
+
+
+def rgb_to_xyz(rgb):
+    """Convert a packed sRGB color to CIE XYZ (D65)."""
+    r = SRGB_TO_LINEAR[(rgb >> 16) & 0xFF]
+    g = SRGB_TO_LINEAR[(rgb >> 8) & 0xFF]
+    b = SRGB_TO_LINEAR[rgb & 0xFF]
+    return (
+        0.4124564 * r + 0.3575761 * g + 0.1804375 * b,
+        0.2126729 * r + 0.7151522 * g + 0.0721750 * b,
+        0.0193339 * r + 0.1191920 * g + 0.9503041 * b,
+    )
+
+
+def rgb_to_lab(rgb):
+    """Convert a packed sRGB color to CIE L*a*b* (D65)."""
+    x, y, z = rgb_to_xyz(rgb)
+    fx = lab_f(x / WHITE_X)
+    fy = lab_f(y / WHITE_Y)
+    fz = lab_f(z / WHITE_Z)
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def delta_e(lab1, lab2):
+    """CIE76 color difference (Euclidean distance in Lab)."""
+    return math.sqrt(
+        (lab1[0] - lab2[0]) ** 2 + (lab1[1] - lab2[1]) ** 2 + (lab1[2] - lab2[2]) ** 2
+    )
+
+
+def linear_to_srgb8(c):
+    """Convert a linear-light channel to a clamped 8-bit sRGB value."""
+    c = min(max(c, 0.0), 1.0)
+    c = 12.92 * c if c <= 0.0031308 else 1.055 * c ** (1 / 2.4) - 0.055
+    return int(round(c * 255))
+
+
+def lab_to_rgb(lab):
+    """Convert CIE L*a*b* (D65) to a packed sRGB color, clamping to the gamut."""
+    l, a, b = lab
+    fy = (l + 16) / 116
+    fx = fy + a / 500
+    fz = fy - b / 200
+    x = WHITE_X * (fx ** 3 if fx ** 3 > LAB_EPSILON else (116 * fx - 16) / LAB_KAPPA)
+    y = WHITE_Y * (fy ** 3 if l > LAB_KAPPA * LAB_EPSILON else l / LAB_KAPPA)
+    z = WHITE_Z * (fz ** 3 if fz ** 3 > LAB_EPSILON else (116 * fz - 16) / LAB_KAPPA)
+    r = linear_to_srgb8(3.2404542 * x - 1.5371385 * y - 0.4985314 * z)
+    g = linear_to_srgb8(-0.9692660 * x + 1.8760108 * y + 0.0415560 * z)
+    bl = linear_to_srgb8(0.0556434 * x - 0.2040259 * y + 1.0572252 * z)
+    return (r << 16) | (g << 8) | bl
@@ -1,26 +1,84 @@
 import sys
 import os  # Added for resource_path
-import sqlite3
+import time
+import json
+import threading
+import collections
+import multiprocessing
 import logging
+import logging.handlers
+import atexit
+import queue
+
+STARTED_AT = time.perf_counter()  # Reference point for the startup report
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    # Command line mode: hand over before PyQt5 and pynput are imported
+    import color_cli
+    if color_cli.is_command_line(sys.argv[1:]):
+        sys.exit(color_cli.main(sys.argv[1:]))
+
 from PyQt5 import QtWidgets, QtGui, QtCore
 from PyQt5.QtWidgets import (
     QApplication,
     QColorDialog,
+    QFileDialog,
     QSystemTrayIcon,
     QMenu,
     QAction,
     QMessageBox,
     QLabel,
     QPushButton,
-    QGridLayout,
-    QVBoxLayout,
     QHBoxLayout,
     QWidget,
-    QScrollArea,
+    QListView,
+    QStyledItemDelegate,
+    QStyle,
+    QCheckBox,
+    QDialog,
+    QDoubleSpinBox,
+    QListWidget,
+    QRubberBand,
+)
+from PyQt5.QtGui import (
+    QIcon,
+    QColor,
+    QCursor,
+    QImage,
+    QPixmap,
+    QPainter,
+    QFont,
+    QFontMetrics,
+    QPen,
+    QBrush,
 )
-from PyQt5.QtGui import QIcon, QColor, QCursor
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QObject, QThread
-from pynput import keyboard
+from PyQt5.QtCore import (
+    Qt,
+    QTimer,
+    QRect,
+    QPoint,
+    QSize,
+    QRectF,
+    QPointF,
+    QEvent,
+    QModelIndex,
+    QAbstractListModel,
+    pyqtSignal,
+    QObject,
+    QThread,
+)
+
+import palette_store
+import palette_io
+import palette_extract
+import palette_compact
+import region_stats
+import color_formats
+import sample_client
+from palette_index import PaletteIndex
+from sample_history import SampleHistory
+from screen_capture import ScreenTopology, ScreenCapture
+from metrics import METRICS
 
 
 def resource_path(relative_path):
@@ -33,305 +91,1587 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
-# Initialize logging
-logging.basicConfig(
-    filename="color_picker.log",
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Overlay sampling rates (milliseconds between samples)
+SAMPLE_ACTIVE_INTERVAL_MS = 16  # While the cursor is moving, about one per frame
+SAMPLE_IDLE_INTERVAL_MS = 250  # While the cursor is still, only re-check screen content
+SAMPLE_IDLE_AFTER_MS = 300  # Stillness needed before dropping to the idle rate
 
 
-class ColorLabel(QWidget):
-    """A widget to display a saved color with its code and a copy button."""
+# Saved colors are loaded in chunks from the event loop once the window is up
+PALETTE_LOAD_CHUNK = 1000
+# Set to a file path to also write the startup report there as JSON
+STARTUP_REPORT_ENV = "COLOR_PICKER_STARTUP_REPORT"
 
-    def __init__(self, red, green, blue, parent=None):
-        super().__init__(parent)
-        self.red = red
-        self.green = green
-        self.blue = blue
-        self.initUI()
+COMPACT_PREVIEW_ROWS = 500  # Merges listed in the compaction preview
 
-    def initUI(self):
-        try:
-            layout = QVBoxLayout()
-            layout.setSpacing(1)
-            layout.setContentsMargins(2, 2, 2, 2)
-            self.setLayout(layout)
-
-            # Color display
-            self.color_display = QLabel()
-            self.color_display.setFixedSize(40, 40)
-            self.color_display.setStyleSheet(
-                f"background-color: rgb({self.red}, {self.green}, {self.blue}); "
-                "border: 1px solid #444; border-radius: 3px;"
-            )
-            layout.addWidget(self.color_display, alignment=Qt.AlignCenter)
-
-            # Color code label
-            self.color_code = QLabel(f"#{self.red:02X}{self.green:02X}{self.blue:02X}")
-            self.color_code.setAlignment(Qt.AlignCenter)
-            self.color_code.setStyleSheet("color: #f0f0f0; font-size: 10px;")
-            layout.addWidget(self.color_code)
-
-            # Copy button
-            self.copy_button = QPushButton("Copy")
-            self.copy_button.setFixedSize(50, 22)
-            self.copy_button.setStyleSheet("""
-                QPushButton {
-                    background-color: #555;
-                    border: 1px solid #666;
-                    border-radius: 3px;
-                    color: white;
-                    font-size: 10px;
-                }
-                QPushButton:hover {
-                    background-color: #666;
-                }
-            """)
-            self.copy_button.clicked.connect(self.copyColorCode)
-            layout.addWidget(self.copy_button, alignment=Qt.AlignCenter)
-
-            # Color preview on hover
-            self.preview_label = QLabel(self)
-            self.preview_label.setFixedSize(50, 20)
-            self.preview_label.setStyleSheet("""
-                QLabel {
-                    background-color: rgba(0, 0, 0, 200);
-                    color: white;
-                    border-radius: 3px;
-                    font-size: 8px;
-                }
-            """)
-            self.preview_label.setAlignment(Qt.AlignCenter)
-            self.preview_label.setText(self.color_code.text())
-            self.preview_label.move(self.color_display.x(), self.color_display.y() - 25)
-            self.preview_label.hide()
+HISTORY_STRIP_COLORS = 12  # Distinct recently hovered colors offered for saving
+HISTORY_STRIP_REFRESH_MS = 250
 
-        except Exception as e:
-            logging.error("Error initializing ColorLabel: %s", str(e))
-            QMessageBox.critical(self, "Error", "Failed to initialize a color label.")
+METRICS_DUMP_INTERVAL_MS = 10000  # How often recorded latencies are written to the metrics file
+METRICS_PANEL_REFRESH_MS = 1000
+
+SERVICE_MAX_LINE = 1 << 20  # Longest request line the sampling service accepts
+SERVICE_MAX_PENDING = 1 << 20  # Unsent bytes past which a subscriber misses sample events
+SERVICE_PROBE_TIMEOUT_MS = 200  # How long start() waits to find a live server on the socket
+
+# Color formats shown by the overlay and the palette, e.g. "hex,hsl,oklch".
+# The first one is also the code shown on swatches and copied.
+READOUT_FORMATS_ENV = "COLOR_PICKER_FORMATS"
+DEFAULT_READOUT_FORMATS = ("hex",)
+
+
+# Global hotkeys: chord -> action. Chords are "+"-joined key names.
+HOTKEY_BINDINGS = {
+    "alt+1": "pick",
+    "alt+2": "pick_average",
+    "alt+3": "pick_region",
+    "alt+4": "region_mode",
+    "esc": "toggle_overlay",
+}
+HOTKEY_MIN_INTERVAL_MS = 150  # Minimum time between two firings of a chord
+PICK_AVERAGE_RADIUS = 2  # "pick_average" averages a 5x5 box around the cursor
+PICK_REGION_RADIUS = 7  # "pick_region" summarizes a 15x15 box around the cursor
+
+# Region sampling: the statistic saved from a dragged rectangle or "pick_region"
+REGION_SAVE_STATISTIC = "median"  # One of region_stats.STATISTICS
+REGION_GRAB_DELAY_MS = 30  # Lets the overlay's own drawing leave the screen before grabbing
+
+# Left/right variants of modifiers all bind as the plain modifier name
+MODIFIER_ALIASES = {
+    "alt_l": "alt", "alt_r": "alt", "alt_gr": "alt",
+    "ctrl_l": "ctrl", "ctrl_r": "ctrl",
+    "shift_l": "shift", "shift_r": "shift",
+    "cmd_l": "cmd", "cmd_r": "cmd",
+}
+MODIFIERS = frozenset(("alt", "ctrl", "shift", "cmd"))
 
-    def copyColorCode(self):
+
+IMAGE_FILE_FILTER = "Images ({})".format(" ".join("*" + ext for ext in palette_extract.IMAGE_EXTENSIONS))
+PALETTE_FILE_FILTER = (
+    "Palettes (*.gpl *.ase *.css *.json *.csv);;GIMP Palette (*.gpl);;"
+    "Adobe Swatch Exchange (*.ase);;CSS Variables (*.css);;JSON (*.json);;CSV (*.csv)"
+)
+
+
+def readout_formats_from_env():
+    """Return the formats listed in READOUT_FORMATS_ENV, or DEFAULT_READOUT_FORMATS."""
+    names = [name.strip().lower() for name in os.environ.get(READOUT_FORMATS_ENV, "").split(",")]
+    formats = tuple(name for name in color_formats.FORMAT_NAMES if name in names)
+    return formats or DEFAULT_READOUT_FORMATS
+
+
+# Logging
+LOG_FILE = "color_picker.log"
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_MAX_BYTES = 1 << 20  # Rotate the log file at 1 MiB
+LOG_BACKUP_COUNT = 3  # Rotated files kept as color_picker.log.1 ... .3
+LOG_LEVEL_ENV = "COLOR_PICKER_LOG_LEVEL"  # DEBUG, INFO, WARNING, ERROR or CRITICAL
+DEFAULT_LOG_LEVEL = logging.INFO
+
+
+def log_level_from_env():
+    """Return the level named by LOG_LEVEL_ENV, or DEFAULT_LOG_LEVEL."""
+    name = os.environ.get(LOG_LEVEL_ENV, "").strip().upper()
+    if not name:
+        return DEFAULT_LOG_LEVEL
+    level = logging.getLevelName(name)
+    return level if isinstance(level, int) else DEFAULT_LOG_LEVEL
+
+
+def setup_logging(path=LOG_FILE, level=None):
+    """Send log records through a queue to a rotating file on a background thread.
+
+    Callers only pay for formatting the message and a queue put; the file is
+    written and rotated on the listener thread. Records below the level are
+    dropped before any formatting, as long as messages use %-style args.
+    Returns the listener, which is stopped (and drained) at exit.
+    """
+    file_handler = logging.handlers.RotatingFileHandler(
+        path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True
+    )
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    records = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(records, file_handler)
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(records)]
+    root.setLevel(log_level_from_env() if level is None else level)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+class PaletteModel(QAbstractListModel):
+    """List model of saved colors, kept in the same order as the colors table.
+
+    Colors are unique in the table, so rows are keyed by their packed value.
+    The row of each color is cached in a dict. A change only makes the rows
+    after it stale, so finding a row is a dict lookup unless the color sits
+    after the last change, and then only those rows are renumbered.
+    """
+    ColorRole = Qt.UserRole + 1
+    HexRole = Qt.UserRole + 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.colors = []  # Packed 0xRRGGBB values in display order
+        self.formats = DEFAULT_READOUT_FORMATS
+        self.rows = {}  # Packed color -> row, correct for rows before rows_valid
+        self.rows_valid = 0
+        # Rows before this one came from the database load in progress;
+        # colors picked meanwhile stay after them.
+        self.load_row = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.colors)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        rgb = self.colors[index.row()]
+        if role == Qt.DisplayRole:
+            return color_formats.format_color(rgb, self.formats[0])
+        if role == Qt.ToolTipRole:
+            return color_formats.format_lines(rgb, self.formats)
+        if role == self.ColorRole:
+            return QColor(rgb)
+        if role == self.HexRole:
+            return color_formats.format_color(rgb, "hex")
+        return None
+
+    def setColors(self, rows):
+        """Replace the contents with (red, green, blue) rows."""
+        self.beginResetModel()
+        self.colors = [palette_store.pack_rgb(red, green, blue) for red, green, blue in rows]
+        self.rows = {rgb: row for row, rgb in enumerate(self.colors)}
+        self.rows_valid = len(self.colors)
+        self.load_row = len(self.colors)
+        self.endResetModel()
+
+    def setFormats(self, formats):
+        """Show the colors in other formats; the first one is the swatch code."""
+        self.formats = tuple(formats)
+        if self.colors:
+            self.dataChanged.emit(self.index(0), self.index(len(self.colors) - 1),
+                                  [Qt.DisplayRole, Qt.ToolTipRole])
+
+    def hasColor(self, rgb):
+        """Return True if the packed color is in the model."""
+        return rgb in self.rows
+
+    def rowOf(self, rgb):
+        """Return the row holding the packed color."""
+        row = self.rows[rgb]
+        if row < self.rows_valid:
+            return row
+        for row in range(self.rows_valid, len(self.colors)):
+            self.rows[self.colors[row]] = row
+        self.rows_valid = len(self.colors)
+        return self.rows[rgb]
+
+    def invalidateRows(self, row):
+        """Mark the cached rows from row on as stale."""
+        self.rows_valid = min(self.rows_valid, row)
+
+    def appendColor(self, rgb):
+        """Append a single packed color at the end."""
+        row = len(self.colors)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.colors.append(rgb)
+        self.rows[rgb] = row
+        if self.rows_valid == row:
+            self.rows_valid += 1
+        self.endInsertRows()
+
+    def insertLoadedColors(self, rgbs):
+        """Insert loaded colors at load_row, skipping ones already present.
+
+        Returns the colors that were inserted.
+        """
+        rgbs = [rgb for rgb in rgbs if rgb not in self.rows]
+        if not rgbs:
+            return []
+        row = self.load_row
+        self.beginInsertRows(QModelIndex(), row, row + len(rgbs) - 1)
+        self.colors[row:row] = rgbs
+        self.rows.update((rgb, position) for position, rgb in enumerate(rgbs, row))
+        self.invalidateRows(row)
+        self.load_row += len(rgbs)
+        self.endInsertRows()
+        return rgbs
+
+    def removeColor(self, rgb):
+        """Remove the row holding the packed color."""
+        row = self.rowOf(rgb)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.colors[row]
+        del self.rows[rgb]
+        self.invalidateRows(row)
+        if row < self.load_row:
+            self.load_row -= 1
+        self.endRemoveRows()
+
+    def moveColorToEnd(self, rgb):
+        """Move the row holding the packed color to the end."""
+        row = self.rowOf(rgb)
+        if row != len(self.colors) - 1:
+            self.beginMoveRows(QModelIndex(), row, row, QModelIndex(), len(self.colors))
+            self.colors.append(self.colors.pop(row))
+            self.invalidateRows(row)
+            if row < self.load_row:
+                self.load_row -= 1
+            self.endMoveRows()
+
+
+class ColorSwatchDelegate(QStyledItemDelegate):
+    """Paint a saved color as a swatch with its code and a copy button."""
+    SWATCH_SIZE = 40
+    CODE_HEIGHT = 14
+    BUTTON_WIDTH = 50
+    BUTTON_HEIGHT = 22
+    PREVIEW_WIDTH = 50
+    PREVIEW_HEIGHT = 20
+    MARGIN = 2
+    SPACING = 1
+    CELL_HEIGHT = MARGIN + SWATCH_SIZE + SPACING + CODE_HEIGHT + SPACING + BUTTON_HEIGHT + MARGIN
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Fonts, pens and brushes are built once and shared by every cell
+        self.code_font = QFont()
+        self.code_font.setPixelSize(10)
+        self.preview_font = QFont()
+        self.preview_font.setPixelSize(8)
+        self.swatch_pen = QPen(QColor("#444"))
+        self.button_pen = QPen(QColor("#666"))
+        self.text_pen = QPen(QColor("#f0f0f0"))
+        self.white_pen = QPen(Qt.white)
+        self.button_brush = QBrush(QColor("#555"))
+        self.button_hover_brush = QBrush(QColor("#666"))
+        self.preview_brush = QBrush(QColor(0, 0, 0, 200))
+        self.cell_width = self.BUTTON_WIDTH + 2 * self.MARGIN  # Set by the view
+
+    def sizeHint(self, option, index):
+        return QSize(self.cell_width, self.CELL_HEIGHT + 3)
+
+    def cellRects(self, rect):
+        """Return the swatch, code and button rectangles inside a cell."""
+        center_x = rect.center().x()
+        top = rect.top() + self.MARGIN
+        swatch = QRect(center_x - self.SWATCH_SIZE // 2, top, self.SWATCH_SIZE, self.SWATCH_SIZE)
+        top += self.SWATCH_SIZE + self.SPACING
+        code = QRect(rect.left(), top, rect.width(), self.CODE_HEIGHT)
+        top += self.CODE_HEIGHT + self.SPACING
+        button = QRect(center_x - self.BUTTON_WIDTH // 2, top, self.BUTTON_WIDTH, self.BUTTON_HEIGHT)
+        return swatch, code, button
+
+    def paint(self, painter, option, index):
+        code_text = index.data(Qt.DisplayRole)
+        swatch, code, button = self.cellRects(option.rect)
+        hovered = bool(option.state & QStyle.State_MouseOver)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+
+        # Color display
+        painter.setPen(self.swatch_pen)
+        painter.setBrush(index.data(PaletteModel.ColorRole))
+        painter.drawRoundedRect(swatch, 3, 3)
+
+        # Color code label
+        painter.setFont(self.code_font)
+        painter.setPen(self.text_pen)
+        code_text = painter.fontMetrics().elidedText(code_text, Qt.ElideRight, code.width())
+        painter.drawText(code, Qt.AlignCenter, code_text)
+
+        # Copy button
+        painter.setPen(self.button_pen)
+        painter.setBrush(self.button_hover_brush if hovered else self.button_brush)
+        painter.drawRoundedRect(button, 3, 3)
+        painter.setPen(self.white_pen)
+        painter.drawText(button, Qt.AlignCenter, "Copy")
+
+        # Color preview on hover
+        if hovered:
+            preview = QRect(0, 0, self.PREVIEW_WIDTH, self.PREVIEW_HEIGHT)
+            preview.moveCenter(swatch.center())
+            painter.setPen(Qt.NoPen)
+            painter.setBrush(self.preview_brush)
+            painter.drawRoundedRect(preview, 3, 3)
+            painter.setFont(self.preview_font)
+            painter.setPen(self.white_pen)
+            painter.drawText(preview, Qt.AlignCenter, index.data(PaletteModel.HexRole))
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        """Copy the color code when the copy button is clicked."""
+        if event.type() == QEvent.MouseButtonRelease and event.button() == Qt.LeftButton:
+            if self.cellRects(option.rect)[2].contains(event.pos()):
+                self.copyColorCode(index.data(Qt.DisplayRole))
+                return True
+        return super().editorEvent(event, model, option, index)
+
+    def copyColorCode(self, code):
         """Copy the color code to the clipboard."""
         try:
             clipboard = QtWidgets.QApplication.clipboard()
-            clipboard.setText(self.color_code.text())
-            logging.info(f"Copied color code {self.color_code.text()} to clipboard.")
+            clipboard.setText(code)
+            logging.info("Copied color code %s to clipboard.", code)
         except Exception as e:
             logging.error("Error copying color code to clipboard: %s", str(e))
-            QMessageBox.critical(self, "Error", "Failed to copy color code.")
+            QMessageBox.critical(None, "Error", "Failed to copy color code.")
 
-    def enterEvent(self, event):
-        """Show the color preview label on hover."""
-        self.preview_label.show()
 
-    def leaveEvent(self, event):
-        """Hide the color preview label when not hovering."""
-        self.preview_label.hide()
+class PaletteView(QListView):
+    """Virtualized grid of saved colors with a fixed number of columns.
 
+    Only the visible swatches are painted, so the palette size only affects
+    the model, not the number of widgets.
+    """
 
-class HotkeyListener(QObject):
-    """A class to listen for global hotkeys using pynput."""
+    def __init__(self, columns, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.setViewMode(QListView.ListMode)
+        self.setFlow(QListView.LeftToRight)
+        self.setWrapping(True)
+        self.setResizeMode(QListView.Adjust)
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(5000)
+        self.setMovement(QListView.Static)
+        self.setSelectionMode(QListView.NoSelection)
+        self.setEditTriggers(QListView.NoEditTriggers)
+        self.setVerticalScrollMode(QListView.ScrollPerPixel)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        # A permanent scrollbar keeps the column width stable while wrapping
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOn)
+        self.setMouseTracking(True)
+        self.viewport().setAttribute(Qt.WA_Hover, True)
+        self.setStyleSheet("""
+            QListView {
+                background-color: #2b2b2b;
+                border: 1px solid #444;
+            }
+        """)
+
+    def resizeEvent(self, event):
+        """Keep the grid at a fixed number of columns."""
+        delegate = self.itemDelegate()
+        if isinstance(delegate, ColorSwatchDelegate):
+            cell_width = max((self.viewport().width() - 1) // self.columns,
+                             ColorSwatchDelegate.BUTTON_WIDTH + 2 * ColorSwatchDelegate.MARGIN)
+            if cell_width != delegate.cell_width:
+                delegate.cell_width = cell_width
+                self.scheduleDelayedItemsLayout()
+        super().resizeEvent(event)
+
+
+class CaptureWorker(QObject):
+    """Serve "pick at (x, y)" requests posted from any thread.
+
+    Requests are queued under a lock and drained in batches on the thread
+    that owns the worker. That must be the GUI thread, since QScreen.grabWindow
+    and QPixmap are not safe to use anywhere else.
+    """
     color_picked = pyqtSignal(int, int, int)
+    wake = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.capture = ScreenCapture()
+        self.requests = collections.deque()
+        self.lock = threading.Lock()
+        self.overlay = None  # Cleared off the screen when it covers a pick
+        self.waiting = False  # Waiting for the overlay to leave the screen
+        self.wake.connect(self.drain, Qt.QueuedConnection)
+
+    def request_pick(self, x, y, radius=0, statistic=None):
+        """Queue a pick at global (x, y). Safe to call from any thread.
+
+        A non-zero radius picks the average of the surrounding square, or the
+        named region_stats statistic of it.
+        """
+        with self.lock:
+            self.requests.append((x, y, radius, statistic))
+            first = len(self.requests) == 1
+        # Only the first request of a burst needs to wake the worker
+        if first:
+            self.wake.emit()
+
+    def drain(self):
+        """Capture and emit every queued pick.
+
+        If the overlay has drawn over a requested square, it is suspended
+        first and the picks are taken once it is off the screen.
+        """
+        if self.waiting:
+            return
+        overlay = self.overlay
+        if overlay is not None:
+            with self.lock:
+                rects = [QRect(x - radius, y - radius, 2 * radius + 1, 2 * radius + 1)
+                         for x, y, radius, _ in self.requests]
+            if any(overlay.obstructs(rect) for rect in rects):
+                self.waiting = True
+                overlay.suspend()
+                QTimer.singleShot(REGION_GRAB_DELAY_MS, lambda: self.drainCleared(overlay))
+                return
+        self.capturePending()
+
+    def drainCleared(self, overlay):
+        self.waiting = False
+        try:
+            self.capturePending()
+        finally:
+            overlay.resume()
+
+    def capturePending(self):
+        while True:
+            with self.lock:
+                if not self.requests:
+                    return
+                x, y, radius, statistic = self.requests.popleft()
+            try:
+                if statistic:
+                    statistics = self.capture.region_statistics_at(x, y, radius)
+                    color = QColor(statistics[statistic]) if statistics else None
+                elif radius:
+                    color = self.capture.average_at(x, y, radius)
+                else:
+                    color = self.capture.pixel_at(x, y)
+                if color is not None:
+                    self.color_picked.emit(color.red(), color.green(), color.blue())
+            except Exception as e:
+                logging.error("Error capturing picked color: %s", str(e))
+
+
+def hotkey_name(key):
+    """Return the binding name of a pynput key, e.g. "alt", "1" or "esc"."""
+    name = getattr(key, 'name', None)  # keyboard.Key members
+    if name is not None:
+        return MODIFIER_ALIASES.get(name, name)
+    char = getattr(key, 'char', None)
+    if char and char.isprintable():
+        return char.lower()
+    # Modifiers can turn the char into a control code; fall back to the key code
+    vk = getattr(key, 'vk', None)
+    if vk is not None and (0x30 <= vk <= 0x39 or 0x41 <= vk <= 0x5A):
+        return chr(vk).lower()
+    return vk
 
-    def __init__(self):
+
+def parse_chord(chord):
+    """Turn a chord string like "alt+1" into a set of binding names."""
+    return frozenset(part.strip().lower() for part in chord.split('+'))
+
+
+class HotkeyListener(QObject):
+    """A class to listen for global hotkeys using pynput.
+
+    Tracks the set of held keys so that an action fires only on the key-down
+    edge of its chord (OS auto-repeat is ignored), and at most once per
+    min_interval milliseconds. A chord is the held modifiers plus the key
+    just pressed, so a missed release of another key cannot block it.
+    Chords are resolved with one dictionary lookup.
+    """
+    overlay_toggled = pyqtSignal()
+    region_mode_toggled = pyqtSignal()
+
+    def __init__(self, capture_worker, bindings=None, min_interval=HOTKEY_MIN_INTERVAL_MS):
         super().__init__()
-        self.is_alt_pressed = False
+        self.capture_worker = capture_worker
+        self.min_interval = min_interval / 1000.0
+        self.held = set()
+        self.last_fired = {}
+
+        # Precompute chord -> handler once, so a keystroke costs one lookup
+        actions = {
+            "pick": self.pick,
+            "pick_average": self.pick_average,
+            "pick_region": self.pick_region,
+            "toggle_overlay": self.overlay_toggled.emit,
+            "region_mode": self.region_mode_toggled.emit,
+        }
+        if bindings is None:
+            bindings = HOTKEY_BINDINGS
+        self.dispatch = {}
+        for chord, action in bindings.items():
+            if action not in actions:
+                logging.warning("Ignoring hotkey %s bound to unknown action %s.", chord, action)
+                continue
+            self.dispatch[parse_chord(chord)] = actions[action]
+
+        self.listener = None
+        self.start()
+
+    def start(self):
+        """Start a fresh keyboard listener; keys held before it are forgotten."""
+        from pynput import keyboard  # Imported on first use; it hooks the OS input stack
+        self.held.clear()
         self.listener = keyboard.Listener(on_press=self.on_press, on_release=self.on_release)
         self.listener.start()
 
     def on_press(self, key):
+        started = METRICS.start()
         try:
-            if key == keyboard.Key.alt or key == keyboard.Key.alt_l or key == keyboard.Key.alt_r:
-                self.is_alt_pressed = True
-            elif self.is_alt_pressed and key == keyboard.KeyCode.from_char('1'):
-                # Capture color at cursor position
-                pos = QCursor.pos()
-                x, y = pos.x(), pos.y()
-                screen = QtWidgets.QApplication.screenAt(pos)
-                if not screen:
-                    screen = QtWidgets.QApplication.primaryScreen()
-                if screen is None:
-                    return
-                relative_x = x - screen.geometry().x()
-                relative_y = y - screen.geometry().y()
-                if relative_x < 0 or relative_y < 0 or relative_x >= screen.size().width() or relative_y >= screen.size().height():
-                    return
-                pixmap = screen.grabWindow(0)
-                if 0 <= relative_x < pixmap.width() and 0 <= relative_y < pixmap.height():
-                    color = pixmap.toImage().pixelColor(relative_x, relative_y)
-                    self.color_picked.emit(color.red(), color.green(), color.blue())
+            name = hotkey_name(key)
+            if name is None or name in self.held:
+                return  # Auto-repeat of a key that is already down
+            if name in MODIFIERS:
+                self.held.add(name)
+                return
+            # Only the latest key can auto-repeat; older ones may have missed their release
+            self.held &= MODIFIERS
+            self.held.add(name)
+            chord = frozenset(self.held)
+            handler = self.dispatch.get(chord)
+            if handler is None:
+                return
+            now = time.monotonic()
+            if now - self.last_fired.get(chord, float('-inf')) < self.min_interval:
+                return
+            self.last_fired[chord] = now
+            handler()
         except Exception as e:
             logging.error("Error in hotkey listener on_press: %s", str(e))
+        finally:
+            METRICS.stop("hotkey.on_press", started)
 
     def on_release(self, key):
         try:
-            if key == keyboard.Key.alt or key == keyboard.Key.alt_l or key == keyboard.Key.alt_r:
-                self.is_alt_pressed = False
+            self.held.discard(hotkey_name(key))
         except Exception as e:
             logging.error("Error in hotkey listener on_release: %s", str(e))
 
+    def pick(self):
+        """Hand the cursor position to the capture worker; never grab here."""
+        pos = QCursor.pos()
+        self.capture_worker.request_pick(pos.x(), pos.y())
+
+    def pick_average(self):
+        """Request the average color of the box around the cursor."""
+        pos = QCursor.pos()
+        self.capture_worker.request_pick(pos.x(), pos.y(), PICK_AVERAGE_RADIUS)
+
+    def pick_region(self):
+        """Request the REGION_SAVE_STATISTIC color of the box around the cursor."""
+        pos = QCursor.pos()
+        self.capture_worker.request_pick(pos.x(), pos.y(), PICK_REGION_RADIUS, REGION_SAVE_STATISTIC)
+
     def stop(self):
         """Stop the keyboard listener."""
         self.listener.stop()
+        self.held.clear()
 
 
-class ColorPickerOverlay(QWidget):
-    """An overlay widget to display color information under the cursor."""
+class SamplingScheduler(QObject):
+    """Schedule overlay samples from cursor motion instead of a fixed timer.
 
-    def __init__(self):
+    Samples immediately when the cursor starts moving, at most once per
+    active interval while it keeps moving, and at the idle interval once it
+    has been still for a while so changing screen content is still picked up.
+    """
+    sample = pyqtSignal()
+
+    def __init__(self, active_interval=SAMPLE_ACTIVE_INTERVAL_MS,
+                 idle_interval=SAMPLE_IDLE_INTERVAL_MS,
+                 idle_after=SAMPLE_IDLE_AFTER_MS, parent=None):
+        super().__init__(parent)
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.idle_after = idle_after
+        self.last_pos = None
+        self.last_motion = 0.0
+        self.idle = False
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+
+    def start(self):
+        """Start sampling, beginning with an immediate sample."""
+        self.last_pos = None
+        self.idle = False
+        self.timer.start(self.active_interval)
+        self.tick()
+
+    def stop(self):
+        """Stop sampling."""
+        self.timer.stop()
+
+    def notify_motion(self):
+        """Wake up from the idle rate when motion is reported by an event."""
+        if self.timer.isActive() and self.idle:
+            self.tick()
+
+    def tick(self):
+        """Sample if the cursor moved, or if the idle interval has elapsed."""
+        pos = QCursor.pos()
+        now = time.monotonic()
+        if pos != self.last_pos:
+            self.last_pos = pos
+            self.last_motion = now
+            if self.idle:
+                self.idle = False
+                self.timer.setInterval(self.active_interval)
+            self.sample.emit()
+        elif self.idle:
+            # Cursor is still; only re-check the screen content
+            self.sample.emit()
+        elif (now - self.last_motion) * 1000 >= self.idle_after:
+            self.idle = True
+            self.timer.setInterval(self.idle_interval)
+
+
+class ColorPickerOverlay(QWidget):
+    """An overlay widget to display color information under the cursor.
+
+    The readout and instructions are painted by the overlay itself from
+    cached panel pixmaps, and each sample only invalidates the rectangles the
+    panels leave and enter, so a full-screen overlay never recomposites more
+    than a few small areas per tick.
+
+    The overlay is transparent to input. In region mode (the region_mode
+    hotkey) it takes the mouse instead: dragging a rectangle samples the
+    mean, median and dominant color of it and emits region_sampled with the
+    REGION_SAVE_STATISTIC one. Anything about to grab pixels the overlay has
+    drawn over calls suspend() and grabs once the drawing is gone.
+    """
+    region_sampled = pyqtSignal(int, int, int)
+    sampled = pyqtSignal(int, int, int)  # Packed color, global x, global y of every sample
+
+    INSTRUCTIONS = ("(ALT+1 to Pick / ALT+2 to Pick Average / ALT+3 to Pick Region / "
+                    "ALT+4 to Drag a Region / ESC to Cancel)")
+    REGION_INSTRUCTIONS = "Drag a rectangle to sample it (ALT+4 to go back)"
+    CURSOR_OFFSET = 15  # Gap between the cursor and the readout
+    INSTRUCTION_GAP = 5  # Gap between the readout and the instructions below it
+    PANEL_CACHE_LIMIT = 256  # Rendered readouts kept before the cache is cleared
+    LOUPE_RADIUS = 7  # The loupe shows the 15x15 pixels around the cursor
+    LOUPE_ZOOM = 9  # Logical pixels per magnified screen pixel
+
+    def __init__(self, active_interval=SAMPLE_ACTIVE_INTERVAL_MS,
+                 idle_interval=SAMPLE_IDLE_INTERVAL_MS, palette_index=None,
+                 formats=DEFAULT_READOUT_FORMATS, history=None):
         super().__init__()
+        self.palette_index = palette_index  # Nearest saved color lookup
+        self.history = history  # SampleHistory of every hovered color
+        self.formats = tuple(formats)  # Color formats in the readout, one per line
         self.setWindowFlags(
             Qt.WindowStaysOnTopHint |
             Qt.FramelessWindowHint |
-            Qt.Tool
+            Qt.Tool |
+            Qt.WindowTransparentForInput
         )
         self.setAttribute(Qt.WA_NoSystemBackground, True)
         self.setAttribute(Qt.WA_TranslucentBackground, True)
         self.setWindowOpacity(1.0)  # Fully opaque for text visibility
-        self.cursor_color_label = QLabel(self)
-        self.cursor_color_label.setStyleSheet("""
+        self.setMouseTracking(True)
+        self.current_color = QColor(0, 0, 0)
+
+        # Painted readout: fonts, pens and panel pixmaps are built once
+        self.readout_font = QFont()
+        self.readout_font.setPixelSize(12)
+        self.instruction_font = QFont()
+        self.instruction_font.setPixelSize(10)
+        self.text_pen = QPen(Qt.white)
+        self.readout_brush = QBrush(QColor(0, 0, 0, 180))
+        self.instruction_brush = QBrush(QColor(0, 0, 0, 150))
+        self.panel_cache = {}  # Readout text -> (pixmap, logical size)
+        self.instruction_panel = None
+        self.panels_visible = False
+        self.readout_text = None
+        self.readout_panel = None
+        self.readout_rect = QRect()
+        self.instruction_rect = QRect()
+
+        # Magnifier loupe: the captured square is scaled into a reused back buffer
+        self.loupe_enabled = True
+        self.loupe_size = (2 * self.LOUPE_RADIUS + 1) * self.LOUPE_ZOOM
+        self.loupe_image = None  # Back buffer, allocated for the device pixel ratio
+        self.loupe_source = QImage()  # Copy of the pixels last magnified
+        self.loupe_rect = QRect()
+        self.loupe_grid_pen = QPen(QColor(0, 0, 0, 40))
+        self.loupe_center_pen = QPen(Qt.white)
+        self.loupe_outline_pen = QPen(QColor("#444"))
+
+        self.active = False  # Between start_overlay and stop_overlay
+        self.suspended = 0  # Pending grabs, plus region mode's hold, the drawing is hidden for
+        self.grabbing = 0  # Pending grabs alone; region mode's fill is hidden only for these
+
+        # Region sampling: rubber band while dragging, statistics afterwards
+        self.region_mode = False
+        self.drag_origin = None
+        self.rubber_band = QRubberBand(QRubberBand.Rectangle, self)
+        self.region_label = QLabel(self)
+        self.region_label.setFont(QFont("Courier New", 10))
+        self.region_label.setStyleSheet("""
             QLabel {
                 background-color: rgba(0, 0, 0, 180);
                 color: white;
                 padding: 5px;
                 border-radius: 5px;
-                font-size: 12px;
             }
         """)
-        self.cursor_color_label.setVisible(False)  # Initially hidden
-        self.setMouseTracking(True)
-        self.current_color = QColor(0, 0, 0)
+        self.region_label.setVisible(False)
 
-        # Instruction Label under the color code
-        self.instruction_label = QLabel("(ALT+1 to Pick / ESC to Cancel)", self)
-        self.instruction_label.setStyleSheet("""
-            QLabel {
-                background-color: rgba(0, 0, 0, 150);
-                color: white;
-                padding: 3px;
-                border-radius: 3px;
-                font-size: 10px;
-            }
-        """)
-        self.instruction_label.adjustSize()
-        self.instruction_label.move(20, 20)
-        self.instruction_label.setVisible(False)  # Initially hidden
+        # Region-limited capture engine for the pixel under the cursor
+        self.capture = ScreenCapture()
+
+        # Motion-driven scheduler to update color under cursor
+        self.scheduler = SamplingScheduler(active_interval, idle_interval, parent=self)
+        self.scheduler.sample.connect(self.update_color)
+
+        # Span the whole virtual desktop, following monitor changes
+        self.topology = ScreenTopology.shared()
+        self.capture.topology = self.topology
+        self.topology.changed.connect(self.screensChanged)
+
+    def coverAllScreens(self):
+        """Size the overlay to the bounding rectangle of every screen."""
+        self.setGeometry(self.topology.virtual_geometry)
 
-        # Timer to update color under cursor
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_color)
+    def screensChanged(self):
+        """Follow a new monitor layout; the device pixel ratio may have changed too."""
+        self.coverAllScreens()
+        self.panel_cache = {}
+        self.loupe_image = None
+        self.instruction_panel = None
+        self.readout_text = None
 
     def resizeEvent(self, event):
-        """Ensure labels are repositioned if the overlay size changes."""
+        """Park the instructions in the corner until the first sample."""
         super().resizeEvent(event)
-        # Position instruction label
-        self.instruction_label.move(20, 20)
+        if self.readout_panel is None:
+            self.placePanels(None, QPoint(20, 20))
+
+    def renderPanel(self, text, font, brush, padding, radius):
+        """Render text on a rounded translucent panel; return (pixmap, logical size)."""
+        bounds = QFontMetrics(font).boundingRect(QRect(), Qt.AlignLeft | Qt.AlignTop, text)
+        size = QSize(bounds.width() + 2 * padding, bounds.height() + 2 * padding)
+        ratio = self.devicePixelRatioF()
+        pixmap = QPixmap(int(size.width() * ratio + 0.999), int(size.height() * ratio + 0.999))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(brush)
+        painter.drawRoundedRect(QRect(QPoint(0, 0), size), radius, radius)
+        painter.setFont(font)
+        painter.setPen(self.text_pen)
+        painter.drawText(QRect(padding, padding, bounds.width(), bounds.height()),
+                         Qt.AlignLeft | Qt.AlignTop, text)
+        painter.end()
+        return pixmap, size
+
+    def readoutPanel(self, text):
+        panel = self.panel_cache.get(text)
+        if panel is None:
+            if len(self.panel_cache) >= self.PANEL_CACHE_LIMIT:
+                self.panel_cache = {}
+            panel = self.panel_cache[text] = self.renderPanel(
+                text, self.readout_font, self.readout_brush, 5, 5)
+        return panel
+
+    def placePanels(self, readout_panel, top_left):
+        """Move the panels, invalidating only the rectangles they leave and enter."""
+        if self.instruction_panel is None:
+            self.instruction_panel = self.renderPanel(
+                self.INSTRUCTIONS, self.instruction_font, self.instruction_brush, 3, 3)
+        old_rects = (self.readout_rect, self.instruction_rect)
+        self.readout_panel = readout_panel
+        if readout_panel is None:
+            self.readout_rect = QRect()
+            instruction_top = top_left.y()
+        else:
+            self.readout_rect = QRect(top_left, readout_panel[1])
+            instruction_top = self.readout_rect.bottom() + 1 + self.INSTRUCTION_GAP
+        self.instruction_rect = QRect(QPoint(top_left.x(), instruction_top), self.instruction_panel[1])
+        if self.panels_visible:
+            for rect in old_rects + (self.readout_rect, self.instruction_rect):
+                if not rect.isEmpty():
+                    self.update(rect)
+
+    def renderLoupe(self, pixels, center):
+        """Magnify a captured square into the back buffer, center pixel outlined.
+
+        Returns False when the pixels are the ones already shown.
+        """
+        if pixels == self.loupe_source and self.loupe_image is not None:
+            return False
+        self.loupe_source = pixels.copy()
+        ratio = self.devicePixelRatioF()
+        if self.loupe_image is None:
+            side = int(self.loupe_size * ratio + 0.999)
+            self.loupe_image = QImage(side, side, QImage.Format_ARGB32_Premultiplied)
+            self.loupe_image.setDevicePixelRatio(ratio)
+        size = self.loupe_size
+        cells = pixels.width()
+        cell = size / cells
+        painter = QPainter(self.loupe_image)
+        # No smoothing: every screen pixel becomes a flat square
+        painter.setRenderHint(QPainter.SmoothPixmapTransform, False)
+        painter.drawImage(QRectF(0, 0, size, size), pixels)
+        painter.setPen(self.loupe_grid_pen)
+        for line in range(1, cells):
+            offset = line * cell
+            painter.drawLine(QPointF(offset, 0), QPointF(offset, size))
+            painter.drawLine(QPointF(0, offset), QPointF(size, offset))
+        painter.setBrush(Qt.NoBrush)
+        painter.setPen(self.loupe_center_pen)
+        painter.drawRect(QRectF(center * cell, center * cell, cell, cell))
+        painter.setPen(self.loupe_outline_pen)
+        painter.drawRect(QRectF(0, 0, size - 1, size - 1))
+        painter.end()
+        return True
+
+    def placeLoupe(self, local_x, local_y, readout_rect, changed):
+        """Put the loupe beside the cursor, on the side away from the readout."""
+        offset = self.CURSOR_OFFSET
+        size = self.loupe_size
+        readout_right = readout_rect.left() > local_x
+        left = local_x - offset - size if readout_right else local_x + offset
+        if left >= 0 and left + size <= self.width():
+            top = min(max(local_y - size // 2, 0), max(self.height() - size, 0))
+        else:
+            # No room across from the readout; share its side, above or below it
+            left = local_x + offset if readout_right else local_x - offset - size
+            readout_below = readout_rect.top() > local_y
+            top = local_y - offset - size if readout_below else local_y + offset
+        rect = QRect(left, top, size, size)
+        if rect != self.loupe_rect:
+            if not self.loupe_rect.isEmpty():
+                self.update(self.loupe_rect)
+            self.loupe_rect = rect
+            self.update(rect)
+        elif changed:
+            self.update(rect)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self.region_mode and not self.grabbing:
+            # Only in region mode: the faintest fill keeps the drag on the overlay
+            painter.fillRect(event.rect(), QColor(0, 0, 0, 1))
+        if self.panels_visible:
+            if self.readout_panel is not None and self.readout_rect.intersects(event.rect()):
+                painter.drawPixmap(self.readout_rect.topLeft(), self.readout_panel[0])
+            if self.instruction_panel is not None and self.instruction_rect.intersects(event.rect()):
+                painter.drawPixmap(self.instruction_rect.topLeft(), self.instruction_panel[0])
+            if self.loupe_enabled and self.loupe_image is not None and self.loupe_rect.intersects(event.rect()):
+                painter.drawImage(self.loupe_rect.topLeft(), self.loupe_image)
+        painter.end()
+
+    def setPanelsVisible(self, visible):
+        if visible != self.panels_visible:
+            self.panels_visible = visible
+            for rect in (self.readout_rect, self.instruction_rect, self.loupe_rect):
+                if not rect.isEmpty():
+                    self.update(rect)
+
+    def obstructs(self, rect):
+        """Whether the overlay currently draws over part of a global rectangle."""
+        if not self.isVisible():
+            return False
+        if self.region_mode:
+            return True
+        local = rect.translated(-self.x(), -self.y())
+        drawn = [self.rubber_band.geometry() if self.rubber_band.isVisible() else QRect(),
+                 self.region_label.geometry() if self.region_label.isVisible() else QRect()]
+        if self.panels_visible:
+            drawn += [self.readout_rect, self.instruction_rect, self.loupe_rect]
+        return any(not area.isEmpty() and area.intersects(local) for area in drawn)
+
+    def suspend(self, grab=True):
+        """Take the overlay's drawing off the screen until the matching resume().
+
+        Region mode holds a suspension with grab=False: its panels stay
+        hidden, but the fill that keeps the drag on the overlay stays painted
+        until an actual grab is pending.
+        """
+        self.suspended += 1
+        if grab:
+            self.grabbing += 1
+        if self.suspended == 1:
+            self.scheduler.stop()
+            self.setPanelsVisible(False)
+        if self.suspended == 1 or (grab and self.grabbing == 1):
+            self.rubber_band.hide()
+            self.region_label.setVisible(False)
+            self.repaint()
+
+    def resume(self, grab=True):
+        self.suspended -= 1
+        if grab:
+            self.grabbing -= 1
+        if not self.active:
+            return
+        if self.suspended == 0 and not self.region_mode:
+            self.setPanelsVisible(True)
+            self.scheduler.start()
+        elif grab and self.grabbing == 0 and self.region_mode:
+            # Restore the fill that holds the drag, and the instructions
+            self.region_label.setVisible(self.drag_origin is None)
+            self.update()
+
+    def setRegionMode(self, enabled):
+        """Let the overlay take the mouse so a region can be dragged."""
+        if enabled == self.region_mode or not self.active:
+            return
+        self.region_mode = enabled
+        self.drag_origin = None
+        self.rubber_band.hide()
+        if enabled:
+            self.suspend(grab=False)
+            self.region_label.setText(self.REGION_INSTRUCTIONS)
+            self.region_label.adjustSize()
+            self.region_label.move(20, 20)
+            self.region_label.setVisible(True)
+        else:
+            self.region_label.setVisible(False)
+        # Changing the flag re-creates the native window, so show it again
+        self.setWindowFlag(Qt.WindowTransparentForInput, not enabled)
+        self.show()
+        self.update()
+        if enabled:
+            self.activateWindow()
+            self.raise_()
+        else:
+            self.resume(grab=False)
+
+    def mouseMoveEvent(self, event):
+        """Sample right away when the cursor moves over the overlay."""
+        self.scheduler.notify_motion()
+        if self.drag_origin is not None:
+            self.rubber_band.setGeometry(QRect(self.drag_origin, event.pos()).normalized())
+        super().mouseMoveEvent(event)
+
+    def mousePressEvent(self, event):
+        """Start dragging a sampling rectangle."""
+        if self.region_mode and event.button() == Qt.LeftButton:
+            self.drag_origin = event.pos()
+            self.rubber_band.setGeometry(QRect(self.drag_origin, QSize()))
+            self.rubber_band.show()
+            self.region_label.setVisible(False)
+        super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        """Leave region mode and sample the rectangle once the overlay is off the screen."""
+        if event.button() == Qt.LeftButton and self.drag_origin is not None:
+            rect = QRect(self.drag_origin, event.pos()).normalized()
+            if rect.width() > 1 and rect.height() > 1:
+                global_rect = rect.translated(self.geometry().topLeft())
+                # Stay suspended through the grab; region mode's own hold ends here
+                self.suspend()
+                self.setRegionMode(False)
+                QTimer.singleShot(REGION_GRAB_DELAY_MS, lambda: self.sample_region(global_rect, rect))
+            else:
+                self.drag_origin = None
+                self.rubber_band.hide()
+        super().mouseReleaseEvent(event)
+
+    def sample_region(self, global_rect, local_rect):
+        """Show the statistics of a global rectangle and emit the saved one.
+
+        Called with the overlay suspended; resumes it once the pixels are read.
+        """
+        try:
+            try:
+                statistics = self.capture.region_statistics(global_rect)
+            finally:
+                self.resume()
+            if statistics is None:
+                return
+            self.region_label.setText(
+                f"{global_rect.width()}x{global_rect.height()} region\n"
+                + region_stats.describe(statistics))
+            self.region_label.adjustSize()
+            self.region_label.move(local_rect.topLeft())
+            self.region_label.setVisible(True)
+            self.region_sampled.emit(*palette_store.unpack_rgb(statistics[REGION_SAVE_STATISTIC]))
+        except Exception as e:
+            logging.error("Error sampling region: %s", str(e))
+            self.region_label.setText("Region sampling failed")
+            self.region_label.adjustSize()
+            self.region_label.move(local_rect.topLeft())
+            self.region_label.setVisible(True)
 
     def start_overlay(self):
         """Start the overlay display."""
-        self.timer.start(30)  # Update every 30ms
-        self.instruction_label.setVisible(True)
-        self.cursor_color_label.setVisible(True)
+        self.active = True
+        self.scheduler.start()
+        self.setPanelsVisible(True)
         self.activateWindow()
         self.raise_()
         logging.info("Overlay started.")
 
     def stop_overlay(self):
         """Stop the overlay display."""
-        self.timer.stop()
-        self.cursor_color_label.setVisible(False)
-        self.instruction_label.setVisible(False)
+        self.setRegionMode(False)
+        self.active = False
+        self.scheduler.stop()
+        self.drag_origin = None
+        self.rubber_band.hide()
+        self.setPanelsVisible(False)
+        self.region_label.setVisible(False)
         self.hide()
         logging.info("Overlay stopped.")
 
     def update_color(self):
         """Update the color under the cursor and display previews."""
+        started = METRICS.start()
         try:
             pos = QCursor.pos()
             x, y = pos.x(), pos.y()
-            screen = QtWidgets.QApplication.screenAt(pos)
-            if not screen:
-                screen = QtWidgets.QApplication.primaryScreen()
-            if screen is None:
-                return
-
-            # Adjust coordinates relative to the screen
-            relative_x = x - screen.geometry().x()
-            relative_y = y - screen.geometry().y()
 
-            if relative_x < 0 or relative_y < 0 or \
-               relative_x >= screen.size().width() or \
-               relative_y >= screen.size().height():
+            # Capture only the square the loupe shows; the readout uses its center
+            grabbed = self.capture.grab(x, y, self.LOUPE_RADIUS if self.loupe_enabled else 0)
+            if grabbed is None:
                 return
-
-            # Capture the pixel color at the cursor position
-            pixmap = screen.grabWindow(0)
-            if 0 <= relative_x < pixmap.width() and 0 <= relative_y < pixmap.height():
-                color = pixmap.toImage().pixelColor(relative_x, relative_y)
-            else:
-                color = QColor(0, 0, 0)
+            pixels, center = grabbed
+            color = QColor(pixels.pixel(center, center))
 
             self.current_color = color
 
             # Update the cursor color label
-            self.cursor_color_label.setText(f"#{color.red():02X}{color.green():02X}{color.blue():02X}")
-            self.cursor_color_label.adjustSize()
-
-            # Determine label position relative to overlay
-            overlay_x = self.geometry().x()
-            overlay_y = self.geometry().y()
-            local_x = x - overlay_x
-            local_y = y - overlay_y
-
-            # Position the color code label near the cursor
-            label_width = self.cursor_color_label.width()
-            label_height = self.cursor_color_label.height()
-
-            # Prevent label from going off the right edge
-            if local_x + 15 + label_width > self.width():
-                new_x = local_x - label_width - 15
+            rgb = color.rgb() & 0xFFFFFF
+            if self.history is not None:
+                self.history.record(rgb)
+            self.sampled.emit(rgb, x, y)
+            text = color_formats.format_lines(rgb, self.formats)
+            if self.palette_index is not None:
+                lookup_started = METRICS.start()
+                nearest = self.palette_index.nearest(rgb)
+                METRICS.stop("overlay.nearest", lookup_started)
+                if nearest is not None:
+                    if nearest[1] < 0.005:
+                        text += "\nAlready saved"
+                    else:
+                        text += f"\nNearest saved #{nearest[0]:06X}  \u0394E {nearest[1]:.1f}"
+            label_started = METRICS.start()
+            panel = self.readout_panel if text == self.readout_text else self.readoutPanel(text)
+            self.readout_text = text
+
+            # Position the readout near the cursor, relative to the overlay
+            offset = self.CURSOR_OFFSET
+            local_x = x - self.x()
+            local_y = y - self.y()
+            label_width = panel[1].width()
+            label_height = panel[1].height()
+
+            # Prevent the readout from going off the right or bottom edge
+            if local_x + offset + label_width > self.width():
+                new_x = local_x - label_width - offset
             else:
-                new_x = local_x + 15
-
-            # Prevent label from going off the bottom edge
-            if local_y + 15 + label_height > self.height():
-                new_y = local_y - label_height - 15
+                new_x = local_x + offset
+            if local_y + offset + label_height > self.height():
+                new_y = local_y - label_height - offset
             else:
-                new_y = local_y + 15
+                new_y = local_y + offset
 
-            self.cursor_color_label.move(new_x, new_y)
-            self.cursor_color_label.setVisible(True)
+            # Nothing to repaint if neither the text nor the position changed
+            if panel is not self.readout_panel or self.readout_rect.topLeft() != QPoint(new_x, new_y):
+                self.placePanels(panel, QPoint(new_x, new_y))
+            METRICS.stop("overlay.labels", label_started)
 
-            # Position the instruction label right below the color code
-            instruction_x = new_x
-            instruction_y = new_y + label_height + 5  # 5 pixels below the color code
-            self.instruction_label.move(instruction_x, instruction_y)
-            self.instruction_label.setVisible(True)
+            if self.loupe_enabled:
+                loupe_started = METRICS.start()
+                self.placeLoupe(local_x, local_y, self.readout_rect, self.renderLoupe(pixels, center))
+                METRICS.stop("overlay.loupe", loupe_started)
 
         except Exception as e:
             logging.error("Error updating color in overlay: %s", str(e))
+        finally:
+            METRICS.stop("overlay.update_color", started)
+
+
+class HistoryStrip(QWidget):
+    """Row of the colors most recently hovered in the overlay.
+
+    Clicking a swatch emits color_chosen with its channels so it can be saved.
+    The strip polls the history's version while shown instead of being
+    notified on every overlay tick.
+    """
+    color_chosen = pyqtSignal(int, int, int)
+
+    def __init__(self, history, count=HISTORY_STRIP_COLORS, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.shown_version = None
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+        title = QLabel("Recently hovered:", self)
+        layout.addWidget(title)
+        self.buttons = []
+        for _ in range(count):
+            button = QPushButton(self)
+            button.setFixedSize(24, 24)
+            button.clicked.connect(lambda checked, button=button: self.choose(button))
+            button.setVisible(False)
+            layout.addWidget(button)
+            self.buttons.append(button)
+        layout.addStretch(1)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+
+    def refresh(self):
+        """Show the latest distinct colors if the history changed."""
+        if self.history.version == self.shown_version:
+            return
+        self.shown_version = self.history.version
+        colors = self.history.recent_distinct(len(self.buttons))
+        for i, button in enumerate(self.buttons):
+            if i < len(colors):
+                rgb = colors[i]
+                button.setProperty("rgb", rgb)
+                button.setStyleSheet(
+                    f"background-color: #{rgb:06X}; border: 1px solid #666; border-radius: 3px;")
+                button.setToolTip(color_formats.format_color(rgb, "hex") + "\nClick to save")
+                button.setVisible(True)
+            else:
+                button.setVisible(False)
+
+    def choose(self, button):
+        rgb = button.property("rgb")
+        if rgb is not None:
+            self.color_chosen.emit(*palette_store.unpack_rgb(rgb))
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start(HISTORY_STRIP_REFRESH_MS)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+
+class CompactDialog(QDialog):
+    """Preview and apply the merge of near-duplicate colors."""
+
+    def __init__(self, conn, threshold=palette_compact.DEFAULT_THRESHOLD, parent=None):
+        super().__init__(parent)
+        self.conn = conn
+        self.merges = {}
+        self.setWindowTitle("Compact Palette")
+        self.setStyleSheet("background-color: #2b2b2b; color: #f0f0f0;")
+        self.resize(460, 420)
+        layout = QtWidgets.QVBoxLayout(self)
+
+        controls = QHBoxLayout()
+        controls.addWidget(QLabel("Merge colors within \u0394E", self))
+        self.thresholdBox = QDoubleSpinBox(self)
+        self.thresholdBox.setRange(0.1, 20.0)
+        self.thresholdBox.setSingleStep(0.5)
+        self.thresholdBox.setValue(threshold)
+        controls.addWidget(self.thresholdBox)
+        previewButton = QPushButton("Preview", self)
+        previewButton.clicked.connect(self.preview)
+        controls.addWidget(previewButton)
+        layout.addLayout(controls)
+
+        self.summary = QLabel(self)
+        layout.addWidget(self.summary)
+        self.mergeList = QListWidget(self)
+        self.mergeList.setFont(QFont("Courier New", 9))
+        layout.addWidget(self.mergeList)
+
+        buttons = QHBoxLayout()
+        self.applyButton = QPushButton("Merge", self)
+        self.applyButton.clicked.connect(self.accept)
+        buttons.addWidget(self.applyButton)
+        closeButton = QPushButton("Cancel", self)
+        closeButton.clicked.connect(self.reject)
+        buttons.addWidget(closeButton)
+        layout.addLayout(buttons)
+
+        self.preview()
+
+    def preview(self):
+        """Plan the compaction at the chosen threshold and list the merges."""
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            self.merges = palette_compact.plan_compaction(self.conn, self.thresholdBox.value())
+        finally:
+            QApplication.restoreOverrideCursor()
+        count = palette_compact.merged_count(self.merges)
+        self.summary.setText(f"{count} colors would merge into {len(self.merges)}.")
+        self.mergeList.clear()
+        for position, (rgb, merged) in enumerate(self.merges.items()):
+            if position == COMPACT_PREVIEW_ROWS:
+                self.mergeList.addItem(f"... and {len(self.merges) - position} more")
+                break
+            item = QtWidgets.QListWidgetItem(palette_compact.describe(rgb, merged))
+            item.setIcon(self.swatchIcon(rgb))
+            self.mergeList.addItem(item)
+        self.applyButton.setEnabled(count > 0)
+
+    def swatchIcon(self, rgb):
+        pixmap = QtGui.QPixmap(16, 16)
+        pixmap.fill(QColor(rgb))
+        return QIcon(pixmap)
+
+
+class MetricsPanel(QWidget):
+    """Debug window listing rolling p50/p95/p99 latencies per instrumented stage."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Performance Metrics")
+        self.setStyleSheet("background-color: #2b2b2b; color: #f0f0f0;")
+        layout = QtWidgets.QVBoxLayout(self)
+
+        controls = QHBoxLayout()
+        self.enabledBox = QCheckBox("Record latencies", self)
+        self.enabledBox.setChecked(METRICS.enabled)
+        self.enabledBox.toggled.connect(self.setRecording)
+        controls.addWidget(self.enabledBox)
+        resetButton = QPushButton("Reset", self)
+        resetButton.clicked.connect(self.reset)
+        controls.addWidget(resetButton)
+        layout.addLayout(controls)
+
+        self.table = QLabel(self)
+        self.table.setFont(QFont("Courier New", 9))
+        self.table.setTextInteractionFlags(Qt.TextSelectableByMouse)
+        self.table.setAlignment(Qt.AlignLeft | Qt.AlignTop)
+        layout.addWidget(self.table)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.refresh()
+
+    def setRecording(self, enabled):
+        METRICS.enabled = enabled
+        logging.info("Latency metrics %s.", "enabled" if enabled else "disabled")
+        self.refresh()
+
+    def reset(self):
+        METRICS.reset()
+        self.refresh()
+
+    def refresh(self):
+        """Redraw the table from the current histograms."""
+        lines = [f"{'stage':<24}{'count':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}  (ms)"]
+        for name, summary in METRICS.summary().items():
+            if summary["count"]:
+                lines.append(
+                    f"{name:<24}{summary['count']:>8}{summary['p50']:>9.2f}{summary['p95']:>9.2f}"
+                    f"{summary['p99']:>9.2f}{summary['max']:>9.2f}"
+                )
+        if len(lines) == 1:
+            lines.append("No samples yet." if METRICS.enabled else "Recording is off.")
+        self.table.setText("\n".join(lines))
+
+    def showEvent(self, event):
+        self.timer.start(METRICS_PANEL_REFRESH_MS)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+
+class PaletteLoading(RuntimeError):
+    """A palette query arrived before the saved colors finished loading."""
+
+
+class SamplingService(QObject):
+    """Serve color samples and palette queries over a local socket.
+
+    Speaks the newline-delimited JSON protocol described in sample_client.
+    Connections are persistent and every complete request line already
+    received is answered in one batch, so pipelined requests cost one read
+    and one write. Requests are handled on the GUI thread, where screen grabs
+    have to happen anyway; a batch that samples under the overlay's drawing
+    waits until the overlay is off the screen, and later requests from the
+    same client wait behind it.
+    """
+
+    def __init__(self, window, address=None, parent=None):
+        super().__init__(parent)
+        from PyQt5.QtNetwork import QLocalServer  # Only loaded when the service is used
+        self.window = window
+        self.address = address or sample_client.service_address()
+        self.capture = ScreenCapture()
+        self.buffers = {}  # Socket -> unparsed bytes
+        self.deferred = set()  # Clients whose batch waits for the overlay to clear
+        self.subscribers = set()
+        self.dropped = 0  # Sample events skipped for subscribers that fell behind
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.UserAccessOption)
+        self.server.newConnection.connect(self.accept)
+        self.handlers = {
+            "ping": self.ping,
+            "sample": self.sample,
+            "sample_many": self.sample_many,
+            "palette": self.palette,
+            "nearest": self.nearest,
+            "subscribe": self.subscribe,
+            "unsubscribe": self.unsubscribe,
+        }
+
+    def start(self):
+        """Listen, replacing a socket left behind by a crashed instance.
+
+        Raises OSError if another instance is already serving on the address.
+        """
+        from PyQt5.QtNetwork import QLocalServer, QLocalSocket
+        probe = QLocalSocket()
+        probe.connectToServer(self.address)
+        if probe.waitForConnected(SERVICE_PROBE_TIMEOUT_MS):
+            probe.disconnectFromServer()
+            raise OSError(f"Another color picker is already serving on {self.address}")
+        # Nobody answers, so whatever is left at the address is stale
+        QLocalServer.removeServer(self.address)
+        if not self.server.listen(self.address):
+            raise OSError(self.server.errorString())
+        logging.info("Sampling service listening on %s.", self.server.fullServerName())
+
+    def stop(self):
+        for client in list(self.buffers):
+            client.disconnectFromServer()
+        self.server.close()
+        logging.info("Sampling service stopped.")
+
+    def accept(self):
+        while self.server.hasPendingConnections():
+            client = self.server.nextPendingConnection()
+            self.buffers[client] = b""
+            client.readyRead.connect(lambda client=client: self.read(client))
+            client.disconnected.connect(lambda client=client: self.drop(client))
+
+    def drop(self, client):
+        self.buffers.pop(client, None)
+        self.deferred.discard(client)
+        self.subscribers.discard(client)
+        client.deleteLater()
+
+    def read(self, client):
+        """Answer every complete request line received so far, in order."""
+        data = self.buffers.get(client, b"") + bytes(client.readAll())
+        if client in self.deferred:
+            lines, rest = [], data  # Everything waits behind the deferred batch
+        else:
+            *lines, rest = data.split(b"\n")
+        if len(rest) > SERVICE_MAX_LINE:
+            logging.warning("Dropping sampling client after an oversized request.")
+            client.disconnectFromServer()
+            return
+        self.buffers[client] = rest
+        requests = [self.parse(line) for line in lines if line.strip()]
+        if not requests:
+            return
+        overlay = self.window.overlay
+        if overlay is not None and any(overlay.obstructs(QRect(x, y, 1, 1))
+                                       for request in requests for x, y in self.points_of(request)):
+            self.deferred.add(client)
+            overlay.suspend()
+            QTimer.singleShot(REGION_GRAB_DELAY_MS, lambda: self.answerCleared(client, requests, overlay))
+            return
+        self.answer(client, requests)
+
+    def answerCleared(self, client, requests, overlay):
+        try:
+            if client in self.deferred:
+                self.deferred.discard(client)
+                self.answer(client, requests)
+        finally:
+            overlay.resume()
+        if client in self.buffers:
+            self.read(client)  # Requests that arrived while waiting
+
+    def answer(self, client, requests):
+        started = METRICS.start()
+        client.write(b"".join(self.respond(client, request) for request in requests))
+        METRICS.stop("service.batch", started)
+
+    @staticmethod
+    def parse(line):
+        """Decode a request line; a decoding error is answered like a failed request."""
+        try:
+            return json.loads(line)
+        except Exception as e:
+            return e
+
+    @staticmethod
+    def points_of(request):
+        """Screen points a request samples, for checking them against the overlay."""
+        try:
+            if request.get("op") == "sample":
+                return [(int(request["x"]), int(request["y"]))]
+            if request.get("op") == "sample_many":
+                return [(int(x), int(y)) for x, y in request["points"]]
+        except Exception:
+            pass  # Malformed requests fail in respond()
+        return []
+
+    def respond(self, client, request):
+        request_id = None
+        try:
+            if isinstance(request, Exception):
+                raise request
+            request_id = request.get("id")
+            handler = self.handlers.get(request.get("op"))
+            if handler is None:
+                raise ValueError(f"Unknown op: {request.get('op')!r}")
+            response = handler(client, request)
+            response["ok"] = True
+        except PaletteLoading as e:
+            response = {"ok": False, "loading": True, "error": str(e)}
+        except Exception as e:
+            response = {"ok": False, "error": str(e)}
+        if request_id is not None:
+            response["id"] = request_id
+        return json.dumps(response).encode("utf-8") + b"\n"
+
+    @staticmethod
+    def color_text(rgb):
+        return None if rgb is None else f"#{rgb:06X}"
+
+    def ping(self, client, request):
+        return {}
+
+    def sample(self, client, request):
+        color = self.capture.sample_points([(int(request["x"]), int(request["y"]))])[0]
+        return {"color": self.color_text(color)}
+
+    def sample_many(self, client, request):
+        points = [(int(x), int(y)) for x, y in request["points"]]
+        return {"colors": [self.color_text(rgb) for rgb in self.capture.sample_points(points)]}
+
+    def require_loaded(self):
+        if self.window.isLoadingPalette():
+            raise PaletteLoading("Saved palette is still loading")
+
+    def palette(self, client, request):
+        # The grid already shows queued picks, so there is no need to wait for the writer
+        self.require_loaded()
+        return {"colors": [self.color_text(rgb) for rgb in self.window.paletteModel.colors]}
+
+    def nearest(self, client, request):
+        rgb = int(str(request["color"]).lstrip("#"), 16)
+        self.require_loaded()
+        found = self.window.colorIndex.nearest(rgb)
+        if found is None:
+            return {"color": None, "delta_e": None}
+        return {"color": self.color_text(found[0]), "delta_e": round(found[1], 3)}
+
+    def subscribe(self, client, request):
+        self.subscribers.add(client)
+        return {}
+
+    def unsubscribe(self, client, request):
+        self.subscribers.discard(client)
+        return {}
+
+    def publish(self, rgb, x, y):
+        """Stream an overlay sample to the subscribed clients.
+
+        A subscriber with more than SERVICE_MAX_PENDING bytes still unsent
+        skips the event, so a client that stops reading cannot grow the
+        app's memory without bound.
+        """
+        if not self.subscribers:
+            return
+        line = json.dumps({
+            "event": "sample", "color": self.color_text(rgb), "x": x, "y": y, "time": time.time(),
+        }).encode("utf-8") + b"\n"
+        for client in self.subscribers:
+            if client.bytesToWrite() > SERVICE_MAX_PENDING:
+                self.dropped += 1
+                if self.dropped % 1000 == 1:
+                    logging.warning("Sampling subscriber is not reading; %d events skipped so far.",
+                                    self.dropped)
+                continue
+            client.write(line)
+
+
+class StartupReport:
+    """Timestamps of the startup phases, in seconds since the process started.
+
+    The report is logged once the saved palette has finished loading, and
+    written as JSON to the file named by STARTUP_REPORT_ENV if it is set.
+    """
+
+    def __init__(self, started_at=STARTED_AT):
+        self.started_at = started_at
+        self.phases = []  # (phase, seconds since start)
+        self.finished = False
+
+    def mark(self, phase):
+        if not self.finished:
+            self.phases.append((phase, time.perf_counter() - self.started_at))
+
+    def finish(self):
+        """Record the final phase and emit the report."""
+        if self.finished:
+            return
+        self.mark("palette_loaded")
+        self.finished = True
+        logging.info("Startup: %s", ", ".join(f"{phase} {elapsed * 1000:.1f} ms" for phase, elapsed in self.phases))
+        path = os.environ.get(STARTUP_REPORT_ENV)
+        if path:
+            try:
+                with open(path, "w", encoding="utf-8") as stream:
+                    json.dump({phase: round(elapsed, 6) for phase, elapsed in self.phases}, stream, indent=2)
+            except OSError as e:
+                logging.error("Error writing startup report: %s", str(e))
 
 
 class ColorPickerApp(QtWidgets.QMainWindow):
     """Main application window for the Color Picker."""
+    writer_failed = pyqtSignal(str)  # Emitted from the writer thread
+    palette_job_finished = pyqtSignal(object, object)  # (result, error) of a writer job
+    extraction_finished = pyqtSignal(object, object)  # (results, error) of an image extraction
 
-    def __init__(self):
+    def __init__(self, startup=None):
         super().__init__()
 
+        self.startup = startup or StartupReport()
         self.always_on_top = False  # Track 'Always stay on top' state
         self.max_columns = 6  # Number of columns in the grid
-        self.current_count = 0  # Number of colors added
         self.last_color = QColor(0, 0, 0)
+        self.colorIndex = PaletteIndex()  # Lab index of saved colors for the overlay
+        self.readoutFormats = readout_formats_from_env()
+        self.sampleHistory = SampleHistory()  # Every color hovered in the overlay
+        self.dedupeOnSave = False  # Treat picks within the compaction ΔE as the saved color
+        self.paletteJob = None  # GUI-side handler of the running import or compaction
+        self.dedupeAction = None
+        self.serviceAction = None
+        self.compactThreshold = palette_compact.DEFAULT_THRESHOLD
         self.initUI()
+        self.startup.mark("ui")
         self.createDatabase()
-        self.loadSavedColors()
+        self.startup.mark("database")
         self.initSystemTray()
+        self.startup.mark("tray")
+
+        # Saved colors stream in from the event loop after the window shows
+        self.loading = False
+        self.loadKey = None  # (last_used, id) of the last row loaded
+        self.loadTimer = QTimer(self)
+        self.loadTimer.setSingleShot(True)
+        self.loadTimer.timeout.connect(self.loadNextChunk)
+        self.loadSavedColors()
+
+        # The overlay is built on first use
+        self.overlay = None
+
+        # Latency metrics: debug panel on demand, file dumped periodically
+        self.metricsPanel = None
+        self.metricsTimer = QTimer(self)
+        self.metricsTimer.timeout.connect(self.dumpMetrics)
+        self.metricsTimer.start(METRICS_DUMP_INTERVAL_MS)
 
-        # Initialize overlay
-        self.overlay = ColorPickerOverlay()
+        # Local sampling service for scripts, started on request
+        self.samplingService = None
+        if os.environ.get(sample_client.SERVICE_ENV, "") not in ("", "0"):
+            self.setSamplingService(True)
 
-        # Initialize hotkey listener
+        # Initialize capture worker and hotkey listener
+        self.capture_worker = CaptureWorker(self)
+        self.capture_worker.color_picked.connect(self.saveColor)
         self.hotkey_thread = None
         self.hotkey_listener = None
 
@@ -402,14 +1742,43 @@ class ColorPickerApp(QtWidgets.QMainWindow):
 
             self.layout.addLayout(buttons_layout)
 
-            # Grid layout for saved colors inside a scroll area
-            self.scrollArea = QScrollArea()
-            self.scrollArea.setWidgetResizable(True)
-            self.gridWidget = QWidget()
-            self.gridLayout = QGridLayout(self.gridWidget)
-            self.gridLayout.setSpacing(3)  # Smaller spacing
-            self.scrollArea.setWidget(self.gridWidget)
-            self.layout.addWidget(self.scrollArea)
+            # Palette file buttons
+            palette_buttons_layout = QHBoxLayout()
+
+            self.importButton = QPushButton('Import Palette', self)
+            self.importButton.clicked.connect(self.importPalette)
+            palette_buttons_layout.addWidget(self.importButton)
+
+            self.exportButton = QPushButton('Export Palette', self)
+            self.exportButton.clicked.connect(self.exportPalette)
+            palette_buttons_layout.addWidget(self.exportButton)
+
+            self.extractImageButton = QPushButton('Extract From Images', self)
+            self.extractImageButton.clicked.connect(self.extractFromImages)
+            palette_buttons_layout.addWidget(self.extractImageButton)
+
+            self.extractFolderButton = QPushButton('Extract From Folder', self)
+            self.extractFolderButton.clicked.connect(self.extractFromFolder)
+            palette_buttons_layout.addWidget(self.extractFolderButton)
+
+            self.compactButton = QPushButton('Compact Palette', self)
+            self.compactButton.clicked.connect(self.compactPalette)
+            palette_buttons_layout.addWidget(self.compactButton)
+
+            self.layout.addLayout(palette_buttons_layout)
+
+            # Colors recently passed over in the overlay, one click to save
+            self.historyStrip = HistoryStrip(self.sampleHistory, parent=self)
+            self.historyStrip.color_chosen.connect(self.saveColor)
+            self.layout.addWidget(self.historyStrip)
+
+            # Virtualized grid for saved colors
+            self.paletteModel = PaletteModel(self)
+            self.paletteModel.setFormats(self.readoutFormats)
+            self.paletteView = PaletteView(self.max_columns)
+            self.paletteView.setModel(self.paletteModel)
+            self.paletteView.setItemDelegate(ColorSwatchDelegate(self.paletteView))
+            self.layout.addWidget(self.paletteView)
 
             # Set minimum size
             self.setMinimumSize(500, 400)
@@ -421,18 +1790,15 @@ class ColorPickerApp(QtWidgets.QMainWindow):
     def createDatabase(self):
         """Create or connect to SQLite database."""
         try:
-            self.conn = sqlite3.connect("colors.db")
+            self.conn = palette_store.connect(palette_store.DATABASE_PATH)
             self.cursor = self.conn.cursor()
-            self.cursor.execute("""
-                CREATE TABLE IF NOT EXISTS colors (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    red INTEGER NOT NULL,
-                    green INTEGER NOT NULL,
-                    blue INTEGER NOT NULL
-                )
-            """)
-            self.conn.commit()
-            logging.info("Database connected and ensured table exists.")
+            # All writes go through the background writer; self.conn only reads
+            self.writer_failed.connect(self.onWriterFailed)
+            self.palette_job_finished.connect(self.finishPaletteJob)
+            self.extraction_finished.connect(self.finishPaletteExtraction)
+            self.writer = palette_store.PaletteWriter(palette_store.DATABASE_PATH,
+                                                      on_error=self.writer_failed.emit)
+            logging.info("Database connected and schema is up to date.")
         except Exception as e:
             logging.error("Error creating database: %s", str(e))
             QMessageBox.critical(self, "Database Error", "Failed to create or connect to the database.")
@@ -461,8 +1827,36 @@ class ColorPickerApp(QtWidgets.QMainWindow):
             toggleTopAction.triggered.connect(self.toggleAlwaysOnTopTray)
             trayMenu.addAction(toggleTopAction)
 
+            # Color formats shown by the overlay and the palette
+            formatsMenu = trayMenu.addMenu("Color Formats")
+            self.formatActions = {}
+            for name in color_formats.FORMAT_NAMES:
+                formatAction = QAction(name.upper(), self)
+                formatAction.setCheckable(True)
+                formatAction.setChecked(name in self.readoutFormats)
+                formatAction.toggled.connect(
+                    lambda checked, name=name: self.setReadoutFormat(name, checked))
+                formatsMenu.addAction(formatAction)
+                self.formatActions[name] = formatAction
+
+            self.dedupeAction = QAction("Merge Near-Duplicates On Save", self)
+            self.dedupeAction.setCheckable(True)
+            self.dedupeAction.setChecked(self.dedupeOnSave)
+            self.dedupeAction.toggled.connect(self.setDedupeOnSave)
+            trayMenu.addAction(self.dedupeAction)
+
+            self.serviceAction = QAction("Sampling Service", self)
+            self.serviceAction.setCheckable(True)
+            self.serviceAction.setChecked(os.environ.get(sample_client.SERVICE_ENV, "") not in ("", "0"))
+            self.serviceAction.toggled.connect(self.setSamplingService)
+            trayMenu.addAction(self.serviceAction)
+
+            metricsAction = QAction("Performance Metrics", self)
+            metricsAction.triggered.connect(self.showMetricsPanel)
+            trayMenu.addAction(metricsAction)
+
             quitAction = QAction("Quit", self)
-            quitAction.triggered.connect(QtWidgets.qApp.quit)
+            quitAction.triggered.connect(self.quitApplication)
             trayMenu.addAction(quitAction)
 
             self.trayIcon.setContextMenu(trayMenu)
@@ -473,6 +1867,69 @@ class ColorPickerApp(QtWidgets.QMainWindow):
             logging.error("Error initializing system tray: %s", str(e))
             QMessageBox.critical(self, "Tray Error", "Failed to initialize system tray.")
 
+    def setReadoutFormat(self, name, enabled):
+        """Show or hide one color format in the overlay and the palette."""
+        formats = set(self.readoutFormats)
+        if enabled:
+            formats.add(name)
+        else:
+            formats.discard(name)
+        # Keep at least one format; the first one in FORMAT_NAMES order leads
+        self.readoutFormats = tuple(
+            fmt for fmt in color_formats.FORMAT_NAMES if fmt in formats
+        ) or DEFAULT_READOUT_FORMATS
+        for fmt, action in self.formatActions.items():
+            action.blockSignals(True)
+            action.setChecked(fmt in self.readoutFormats)
+            action.blockSignals(False)
+        self.paletteModel.setFormats(self.readoutFormats)
+        if self.overlay is not None:
+            self.overlay.formats = self.readoutFormats
+        logging.info("Color formats set to %s.", ", ".join(self.readoutFormats))
+
+    def setDedupeOnSave(self, enabled):
+        self.dedupeOnSave = enabled
+        logging.info("Dedupe on save %s.", "enabled" if enabled else "disabled")
+
+    def setSamplingService(self, enabled):
+        """Start or stop serving samples on the local socket."""
+        try:
+            if enabled and self.samplingService is None:
+                service = SamplingService(self, parent=self)
+                try:
+                    service.start()
+                except Exception:
+                    service.deleteLater()
+                    raise
+                self.samplingService = service
+            elif not enabled and self.samplingService is not None:
+                self.samplingService.stop()
+                self.samplingService.deleteLater()
+                self.samplingService = None
+        except Exception as e:
+            if self.serviceAction is not None:
+                self.serviceAction.blockSignals(True)
+                self.serviceAction.setChecked(self.samplingService is not None)
+                self.serviceAction.blockSignals(False)
+            logging.error("Error starting sampling service: %s", str(e))
+            QMessageBox.critical(self, "Error", "Failed to start the sampling service.")
+
+    def publishSample(self, rgb, x, y):
+        if self.samplingService is not None:
+            self.samplingService.publish(rgb, x, y)
+
+    def showMetricsPanel(self):
+        """Show the live latency panel."""
+        if self.metricsPanel is None:
+            self.metricsPanel = MetricsPanel()
+        self.metricsPanel.show()
+        self.metricsPanel.raise_()
+
+    def dumpMetrics(self):
+        """Write the recorded latencies to the metrics file, if recording."""
+        if METRICS.enabled:
+            METRICS.dump()
+
     def onTrayIconActivated(self, reason):
         """Handle tray icon clicks."""
         if reason == QSystemTrayIcon.Trigger:
@@ -594,9 +2051,10 @@ class ColorPickerApp(QtWidgets.QMainWindow):
                 # Update tray menu
                 self.trayIcon.contextMenu().actions()[0].setChecked(True)  # PickFromScreenAction
                 self.start_hotkey_listener()
-                self.overlay.showFullScreen()  # Ensure overlay is shown on all monitors
+                self.ensureOverlay()
+                self.overlay.coverAllScreens()
+                self.overlay.show()
                 self.overlay.start_overlay()
-                self.overlay.setGeometry(QApplication.desktop().screenGeometry())  # Set overlay to cover all screens
                 logging.info("Pick Color From Screen enabled.")
             else:
                 self.screenColorButton.setStyleSheet("""
@@ -614,22 +2072,40 @@ class ColorPickerApp(QtWidgets.QMainWindow):
                 # Update tray menu
                 self.trayIcon.contextMenu().actions()[0].setChecked(False)  # PickFromScreenAction
                 self.stop_hotkey_listener()
-                self.overlay.hide()  # Hide the overlay
-                self.overlay.stop_overlay()
+                if self.overlay is not None:
+                    self.overlay.hide()  # Hide the overlay
+                    self.overlay.stop_overlay()
                 logging.info("Pick Color From Screen disabled.")
         except Exception as e:
             logging.error("Error toggling Pick Color From Screen: %s", str(e))
             QMessageBox.critical(self, "Error", "Failed to toggle Pick Color From Screen.")
 
+    def ensureOverlay(self):
+        """Create the screen picking overlay if it does not exist yet."""
+        if self.overlay is None:
+            self.overlay = ColorPickerOverlay(palette_index=self.colorIndex, formats=self.readoutFormats,
+                                              history=self.sampleHistory)
+            self.overlay.region_sampled.connect(self.saveColor)
+            self.overlay.sampled.connect(self.publishSample)
+            self.capture_worker.overlay = self.overlay
+        return self.overlay
+
+    def toggleRegionModeFromHotkey(self):
+        """Switch the overlay in or out of region dragging."""
+        if self.overlay is not None and self.overlay.active:
+            self.overlay.setRegionMode(not self.overlay.region_mode)
+
+    def toggleOverlayFromHotkey(self):
+        """Toggle screen picking in response to the toggle-overlay hotkey."""
+        self.screenColorButton.toggle()
+        self.togglePickFromScreen()
+
     def pickColor(self):
         """Open color picker dialog and save selected color."""
         try:
             color = QColorDialog.getColor()
             if color.isValid():
-                # Check for duplicates
-                existing_color = self.getColorFromDatabase(color.red(), color.green(), color.blue())
-                if existing_color:
-                    self.removeColor(existing_color[0], color.red(), color.green(), color.blue())
+                # saveColor moves duplicates to the end
                 self.saveColor(color.red(), color.green(), color.blue())
         except Exception as e:
             logging.error("Error picking color: %s", str(e))
@@ -637,121 +2113,360 @@ class ColorPickerApp(QtWidgets.QMainWindow):
 
     def saveColor(self, red, green, blue):
         """Save selected color to the database and display it in the grid."""
+        started = METRICS.start()
         try:
+            rgb = palette_store.pack_rgb(red, green, blue)
+            if self.dedupeOnSave and not self.loading:
+                # A pick indistinguishable from a saved color reuses that color
+                existing = palette_compact.near_duplicate(self.colorIndex, rgb, self.compactThreshold)
+                if existing is not None and existing != rgb:
+                    logging.debug("Merged pick #%06X into saved #%06X.", rgb, existing)
+                    rgb = existing
+                    red, green, blue = palette_store.unpack_rgb(rgb)
+
             # Update last color
             self.last_color = QColor(red, green, blue)
 
-            # Check for duplicates
-            existing_color = self.getColorFromDatabase(red, green, blue)
-            if existing_color:
-                self.removeColor(existing_color[0], red, green, blue)
+            # Queue the insert (or bump of a duplicate) for the background writer
+            self.writer.save(red, green, blue)
+            logging.debug("Queued color RGB(%d, %d, %d) for saving.", red, green, blue)
 
-            # Insert into database
-            self.cursor.execute(
-                "INSERT INTO colors (red, green, blue) VALUES (?, ?, ?)",
-                (red, green, blue)
-            )
-            self.conn.commit()
-            logging.info(f"Saved color RGB({red}, {green}, {blue}) to database.")
-
-            # Refresh grid
-            self.refreshGrid()
+            # Update only the affected grid cell
+            grid_started = METRICS.start()
+            if self.paletteModel.hasColor(rgb):
+                self.moveGridCellToEnd(rgb)
+            else:
+                self.addColorToGrid(red, green, blue)
+                self.colorIndex.add(rgb)
+            METRICS.stop("saveColor.grid", grid_started)
         except Exception as e:
             logging.error("Error saving color to database: %s", str(e))
             QMessageBox.critical(self, "Error", "Failed to save color.")
+        finally:
+            METRICS.stop("saveColor", started)
 
     def getColorFromDatabase(self, red, green, blue):
         """Check if the color already exists in the database."""
         try:
             self.cursor.execute(
-                "SELECT id FROM colors WHERE red=? AND green=? AND blue=?",
-                (red, green, blue)
+                "SELECT id FROM colors WHERE rgb=?",
+                (palette_store.pack_rgb(red, green, blue),)
             )
             return self.cursor.fetchone()
         except Exception as e:
             logging.error("Error checking duplicate color in database: %s", str(e))
             return None
 
-    def removeColor(self, color_id, red, green, blue):
+    def removeColor(self, red, green, blue):
         """Remove the color from the database and grid."""
         try:
-            # Remove from database
-            self.cursor.execute(
-                "DELETE FROM colors WHERE id=?",
-                (color_id,)
-            )
-            self.conn.commit()
-            logging.info(f"Removed duplicate color RGB({red}, {green}, {blue}) from database.")
-
-            # Refresh grid
-            self.refreshGrid()
+            # Queue the removal for the background writer
+            self.writer.remove(red, green, blue)
+            logging.debug("Queued removal of color RGB(%d, %d, %d).", red, green, blue)
+
+            # Remove only this cell from the grid
+            rgb = palette_store.pack_rgb(red, green, blue)
+            self.removeGridCell(rgb)
+            self.colorIndex.remove(rgb)
         except Exception as e:
-            logging.error("Error removing duplicate color: %s", str(e))
-            QMessageBox.critical(self, "Error", "Failed to remove duplicate color.")
+            logging.error("Error removing color: %s", str(e))
+            QMessageBox.critical(self, "Error", "Failed to remove color.")
 
     def loadSavedColors(self):
-        """Load saved colors from the database and display in the grid."""
+        """Start (or restart) loading saved colors into the grid.
+
+        Rows are fetched PALETTE_LOAD_CHUNK at a time from the event loop, so
+        the window stays responsive while a large palette fills in. Each chunk
+        is its own query keyed on the last row loaded, so no read stays open
+        between chunks. Import, compaction and dedupe on save wait for the
+        load, since they need the whole palette.
+        """
         try:
-            self.cursor.execute("SELECT red, green, blue FROM colors")
-            colors = self.cursor.fetchall()
-            for color in colors:
-                red, green, blue = color
-                self.addColorToGrid(red, green, blue)
-            logging.info("Loaded saved colors from database.")
+            self.paletteModel.setColors([])
+            self.colorIndex.rebuild([])
+            self.colorIndex.reserve(self.conn.execute("SELECT COUNT(*) FROM colors").fetchone()[0])
+            self.loadKey = None
+            self.setLoading(True)
+            self.loadTimer.start(0)
+        except Exception as e:
+            self.setLoading(False)
+            logging.error("Error loading colors from database: %s", str(e))
+            QMessageBox.critical(self, "Error", "Failed to load saved colors.")
+
+    def isLoadingPalette(self):
+        return self.loading
+
+    def setLoading(self, loading):
+        self.loading = loading
+        self.updatePaletteButtons()
+
+    def loadNextChunk(self):
+        """Append the next chunk of saved colors to the grid and index."""
+        if not self.loading:
+            return
+        started = METRICS.start()
+        try:
+            if self.loadKey is None:
+                rows = self.conn.execute(
+                    f"SELECT rgb, last_used, id FROM colors {palette_store.ORDER_BY} LIMIT ?",
+                    (PALETTE_LOAD_CHUNK,)).fetchall()
+            else:
+                rows = self.conn.execute(
+                    f"SELECT rgb, last_used, id FROM colors WHERE (last_used, id) > (?, ?) "
+                    f"{palette_store.ORDER_BY} LIMIT ?",
+                    self.loadKey + (PALETTE_LOAD_CHUNK,)).fetchall()
+            if rows:
+                self.loadKey = rows[-1][1:]
+            # Colors picked while loading are already at the end; skip their old rows
+            for rgb in self.paletteModel.insertLoadedColors([row[0] for row in rows]):
+                self.colorIndex.add(rgb)
         except Exception as e:
+            self.setLoading(False)
             logging.error("Error loading colors from database: %s", str(e))
             QMessageBox.critical(self, "Error", "Failed to load saved colors.")
+            return
+        METRICS.stop("grid.load_chunk", started)
+        if len(rows) == PALETTE_LOAD_CHUNK:
+            self.loadTimer.start(0)
+        else:
+            self.setLoading(False)
+            logging.info("Loaded %d saved colors from database.", len(self.paletteModel.colors))
+            self.startup.finish()
 
     def addColorToGrid(self, red, green, blue):
-        """Add a color square to the grid layout in a 6x grid."""
+        """Add a color square to the end of the grid."""
         try:
-            color_label = ColorLabel(red, green, blue)
-            row = self.current_count // self.max_columns
-            col = self.current_count % self.max_columns
-            self.gridLayout.addWidget(color_label, row, col)
-            self.current_count += 1
-            logging.info(f"Added color RGB({red}, {green}, {blue}) to grid at row {row}, column {col}.")
+            self.paletteModel.appendColor(palette_store.pack_rgb(red, green, blue))
+            logging.debug("Added color RGB(%d, %d, %d) to grid.", red, green, blue)
         except Exception as e:
             logging.error("Error adding color to grid: %s", str(e))
             QMessageBox.critical(self, "Error", "Failed to display color.")
 
+    def removeGridCell(self, rgb):
+        """Remove a single color's cell from the grid."""
+        try:
+            self.paletteModel.removeColor(rgb)
+        except Exception as e:
+            logging.error("Error removing color from grid: %s", str(e))
+            self.refreshGrid()
+
+    def moveGridCellToEnd(self, rgb):
+        """Move an existing color's cell to the end of the grid."""
+        try:
+            self.paletteModel.moveColorToEnd(rgb)
+        except Exception as e:
+            logging.error("Error moving color in grid: %s", str(e))
+            self.refreshGrid()
+
+    def flushWriter(self):
+        """Wait a bounded time for queued writes; False if they did not land."""
+        if self.writer.flush(palette_store.WRITER_FLUSH_TIMEOUT):
+            return True
+        logging.error("Palette writer did not finish its queued writes.")
+        return False
+
+    def onWriterFailed(self, message):
+        """Show the palette as stored after writes failed, and say so."""
+        QMessageBox.warning(self, "Palette Not Saved",
+                            f"Some palette changes could not be saved.\n\n{message}")
+        self.loadSavedColors()
+
     def refreshGrid(self):
-        """Refresh the entire grid layout."""
-        try:
-            # Clear grid
-            while self.gridLayout.count():
-                item = self.gridLayout.takeAt(0)
-                widget = item.widget()
-                if widget is not None:
-                    widget.setParent(None)
-
-            # Reload colors
-            self.current_count = 0
-            self.cursor.execute("SELECT red, green, blue FROM colors")
-            colors = self.cursor.fetchall()
-            for color in colors:
-                red, green, blue = color
-                self.addColorToGrid(red, green, blue)
+        """Refresh the entire grid from the database."""
+        started = METRICS.start()
+        try:
+            self.flushWriter()
+            METRICS.stop("refreshGrid.flush", started)
+            self.loadSavedColors()
         except Exception as e:
             logging.error("Error refreshing grid: %s", str(e))
             QMessageBox.critical(self, "Error", "Failed to refresh color grid.")
+        finally:
+            METRICS.stop("refreshGrid", started)
+
+    def startPaletteJob(self, function, handler):
+        """Run function(conn) on the writer thread; handler(result, error) runs here after."""
+        if not self.writer.thread.is_alive():
+            raise RuntimeError("Palette writer is not running")
+        self.paletteJob = handler
+        self.updatePaletteButtons()
+        QApplication.setOverrideCursor(Qt.BusyCursor)
+        self.writer.call(function, lambda result, error: self.palette_job_finished.emit(result, error))
+
+    def finishPaletteJob(self, result, error):
+        """Reload the palette the job rewrote and let the handler report it."""
+        handler, self.paletteJob = self.paletteJob, None
+        QApplication.restoreOverrideCursor()
+        self.updatePaletteButtons()
+        # Picks queued behind the job must be on disk before the grid reloads
+        self.flushWriter()
+        self.loadSavedColors()
+        if handler is not None:
+            handler(result, error)
+
+    def updatePaletteButtons(self):
+        """Bulk rewrites need the whole palette loaded, and run one at a time."""
+        idle = self.paletteJob is None and not self.loading
+        self.importButton.setEnabled(idle)
+        self.compactButton.setEnabled(idle)
+        if self.dedupeAction is not None:
+            self.dedupeAction.setEnabled(not self.loading)
+
+    def importPalette(self):
+        """Import colors from a palette file on the writer thread."""
+        try:
+            path, _ = QFileDialog.getOpenFileName(self, "Import Palette", "", PALETTE_FILE_FILTER)
+            if not path:
+                return
+            # Queued picks are written first, so the import orders after them
+            stats = {}
+
+            def imported(count, error):
+                if error is not None:
+                    QMessageBox.critical(self, "Error", "Failed to import palette.")
+                elif stats["skipped"]:
+                    QMessageBox.warning(self, "Import Palette",
+                                        f"Imported {count} colors; skipped {stats['skipped']} "
+                                        "malformed or out-of-range entries.")
+
+            self.startPaletteJob(lambda conn: palette_io.import_palette(conn, path, stats=stats), imported)
+        except Exception as e:
+            logging.error("Error importing palette: %s", str(e))
+            QMessageBox.critical(self, "Error", "Failed to import palette.")
+
+    def compactPalette(self):
+        """Preview merging near-duplicate colors, then rewrite the table."""
+        try:
+            # The plan has to see every queued pick
+            if not self.flushWriter():
+                QMessageBox.warning(self, "Compact Palette", "Saved colors are not written yet; try again.")
+                return
+            dialog = CompactDialog(self.conn, self.compactThreshold, self)
+            if dialog.exec_() != QDialog.Accepted:
+                return
+            self.compactThreshold = dialog.thresholdBox.value()
+            merges = dialog.merges
+
+            def compacted(removed, error):
+                if error is not None:
+                    QMessageBox.critical(self, "Error", "Failed to compact palette.")
+
+            self.startPaletteJob(lambda conn: palette_compact.apply_compaction(conn, merges), compacted)
+        except Exception as e:
+            logging.error("Error compacting palette: %s", str(e))
+            QMessageBox.critical(self, "Error", "Failed to compact palette.")
+
+    def exportPalette(self):
+        """Export the saved colors to a palette file."""
+        try:
+            path, _ = QFileDialog.getSaveFileName(self, "Export Palette", "palette.gpl", PALETTE_FILE_FILTER)
+            if not path:
+                return
+            if not self.flushWriter():
+                QMessageBox.warning(self, "Export Palette", "Saved colors are not written yet; try again.")
+                return
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                palette_io.export_palette(self.conn, path)
+            finally:
+                QApplication.restoreOverrideCursor()
+        except Exception as e:
+            logging.error("Error exporting palette: %s", str(e))
+            QMessageBox.critical(self, "Error", "Failed to export palette.")
+
+    def extractFromImages(self):
+        """Save the dominant colors of one or more image files."""
+        try:
+            paths, _ = QFileDialog.getOpenFileNames(self, "Extract Colors From Images", "", IMAGE_FILE_FILTER)
+            if paths:
+                self.savePaletteExtraction(paths)
+        except Exception as e:
+            logging.error("Error extracting colors from images: %s", str(e))
+            QMessageBox.critical(self, "Error", "Failed to extract colors from images.")
+
+    def extractFromFolder(self):
+        """Save the dominant colors of every image in a folder."""
+        try:
+            folder = QFileDialog.getExistingDirectory(self, "Extract Colors From Folder")
+            if folder:
+                self.savePaletteExtraction(palette_extract.image_files(folder))
+        except Exception as e:
+            logging.error("Error extracting colors from folder: %s", str(e))
+            QMessageBox.critical(self, "Error", "Failed to extract colors from folder.")
+
+    def savePaletteExtraction(self, paths):
+        """Extract palettes from image files in parallel, then save the colors.
+
+        The process pool is waited on from a background thread, so the window
+        keeps responding; the colors are saved once every image is done.
+        """
+        paths = list(paths)
+        self.extractImageButton.setEnabled(False)
+        self.extractFolderButton.setEnabled(False)
+        QApplication.setOverrideCursor(Qt.BusyCursor)
+        threading.Thread(target=self.runPaletteExtraction, args=(paths,),
+                         name="palette-extract", daemon=True).start()
+
+    def runPaletteExtraction(self, paths):
+        results, error = None, None
+        try:
+            results = palette_extract.extract_files(paths)
+        except Exception as e:
+            error = e
+        self.extraction_finished.emit(results, error)
+
+    def finishPaletteExtraction(self, results, error):
+        """Save the colors extracted from each image, in input order."""
+        QApplication.restoreOverrideCursor()
+        self.extractImageButton.setEnabled(True)
+        self.extractFolderButton.setEnabled(True)
+        if error is not None:
+            logging.error("Error extracting colors from images: %s", str(error))
+            QMessageBox.critical(self, "Error", "Failed to extract colors from images.")
+            return
+        failed = 0
+        for path, palette in results:
+            if palette is None:
+                failed += 1
+                continue
+            for rgb, _fraction in palette:
+                self.saveColor(*palette_store.unpack_rgb(rgb))
+        logging.info("Extracted palettes from %d of %d images.", len(results) - failed, len(results))
+        if failed:
+            QMessageBox.warning(self, "Extract Colors", f"{failed} image(s) could not be read.")
 
     def getAllColors(self):
         """Retrieve all colors from the database."""
         try:
-            self.cursor.execute("SELECT red, green, blue FROM colors")
+            self.flushWriter()
+            self.cursor.execute(f"SELECT red, green, blue FROM colors {palette_store.ORDER_BY}")
             return self.cursor.fetchall()
         except Exception as e:
             logging.error("Error retrieving all colors: %s", str(e))
             return []
 
-    def closeEvent(self, event):
-        """Handle application close event (save state, etc.)."""
+    def closeDatabase(self):
+        """Flush queued writes and close the database connections."""
         try:
+            self.writer.close(palette_store.WRITER_FLUSH_TIMEOUT)
             self.conn.close()
             logging.info("Database connection closed.")
         except Exception as e:
             logging.error("Error closing database: %s", str(e))
+
+    def quitApplication(self):
+        """Quit from the tray, making sure queued colors are written first."""
+        self.setSamplingService(False)
+        self.closeDatabase()
+        self.dumpMetrics()
+        self.stop_hotkey_listener()
+        QtWidgets.qApp.quit()
+
+    def closeEvent(self, event):
+        """Handle application close event (save state, etc.)."""
+        self.setSamplingService(False)
+        self.closeDatabase()
+        self.dumpMetrics()
         # Ensure hotkey listener is stopped
         self.stop_hotkey_listener()
         event.accept()
@@ -760,9 +2475,10 @@ class ColorPickerApp(QtWidgets.QMainWindow):
         """Start the global hotkey listener in a separate thread."""
         if self.hotkey_thread is None:
             self.hotkey_thread = QThread()
-            self.hotkey_listener = HotkeyListener()
+            self.hotkey_listener = HotkeyListener(self.capture_worker)
             self.hotkey_listener.moveToThread(self.hotkey_thread)
-            self.hotkey_listener.color_picked.connect(self.saveColor)
+            self.hotkey_listener.overlay_toggled.connect(self.toggleOverlayFromHotkey)
+            self.hotkey_listener.region_mode_toggled.connect(self.toggleRegionModeFromHotkey)
             self.hotkey_thread.started.connect(lambda: None)  # No specific start action
             self.hotkey_thread.start()
             logging.info("Hotkey listener thread started.")
@@ -781,12 +2497,17 @@ class ColorPickerApp(QtWidgets.QMainWindow):
 
 def main():
     """Main function to run the application."""
+    setup_logging()
     try:
+        startup = StartupReport()
+        startup.mark("imports")
         app = QtWidgets.QApplication(sys.argv)
         # Set application style for better visuals
         app.setStyle("Fusion")
-        window = ColorPickerApp()
+        startup.mark("application")
+        window = ColorPickerApp(startup)
         window.show()
+        startup.mark("window_shown")
         sys.exit(app.exec_())
     except Exception as e:
         logging.critical("Application crashed: %s", str(e))
@@ -795,4 +2516,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Palette extraction workers in frozen builds
     main()
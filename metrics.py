@@ -0,0 +1,103 @@
+"""Lightweight latency instrumentation for the hot paths.
+
+Code under measurement brackets a stage with
+
+    started = METRICS.start()
+    ...
+    METRICS.stop("stage", started)
+
+When metrics are disabled start() returns 0 and stop() returns at once, so
+an instrumented stage costs two cheap calls. When enabled, each stage keeps
+its most recent HISTORY_SIZE durations in a ring buffer, from which p50/p95/
+p99 are computed on demand. Kept free of Qt so any thread can record.
+"""
+import array
+import json
+import logging
+import os
+import threading
+import time
+
+
+METRICS_ENV = "COLOR_PICKER_METRICS"  # Set to 1 to record from startup
+METRICS_FILE = "color_picker_metrics.json"
+HISTORY_SIZE = 1024  # Durations kept per stage for the rolling percentiles
+
+
+class LatencyHistogram:
+    """Rolling window of the latest durations of one stage."""
+
+    def __init__(self, size=HISTORY_SIZE):
+        self.samples = array.array("d", bytes(8 * size))
+        self.next = 0  # Slot for the next sample
+        self.count = 0  # Samples recorded since creation
+        self.total = 0.0
+
+    def record(self, seconds):
+        self.samples[self.next] = seconds
+        self.next = (self.next + 1) % len(self.samples)
+        self.count += 1
+        self.total += seconds
+
+    def summary(self):
+        """Percentiles of the window and totals, in milliseconds."""
+        window = sorted(self.samples[:min(self.count, len(self.samples))])
+        if not window:
+            return {"count": 0}
+
+        def percentile(q):
+            return round(window[min(int(q * len(window)), len(window) - 1)] * 1000, 3)
+
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count * 1000, 3),
+            "p50": percentile(0.50),
+            "p95": percentile(0.95),
+            "p99": percentile(0.99),
+            "max": round(window[-1] * 1000, 3),
+        }
+
+
+class Metrics:
+    """Named latency histograms that can be switched on and off at runtime."""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def start(self):
+        """Return a start time for stop(), or 0 when disabled."""
+        return time.perf_counter() if self.enabled else 0
+
+    def stop(self, name, started):
+        """Record the time since start() under name."""
+        if not started:
+            return
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.record(elapsed)
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+    def summary(self):
+        """Return {stage: summary} sorted by stage name."""
+        with self.lock:
+            return {name: self.histograms[name].summary() for name in sorted(self.histograms)}
+
+    def dump(self, path=METRICS_FILE):
+        """Write the current summary to a JSON file."""
+        report = {"time": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "stages": self.summary()}
+        try:
+            with open(path, "w", encoding="utf-8") as stream:
+                json.dump(report, stream, indent=2)
+        except OSError as e:
+            logging.error("Error writing metrics file: %s", str(e))
+
+
+METRICS = Metrics(enabled=os.environ.get(METRICS_ENV, "") not in ("", "0"))
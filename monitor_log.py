@@ -0,0 +1,91 @@
+"""Rotating NDJSON or CSV log of screen monitoring samples.
+
+Each tick of a monitor becomes one line: the time and the color of every
+watched point, in the order the points were given. Lines go through a large
+write buffer and the file is rotated by size like the application log, so a
+run of several days keeps a bounded amount of memory and disk. Every file
+starts with a header naming the points, so rotated files stand on their own.
+Kept free of Qt so logs can be read back anywhere.
+"""
+import json
+import os
+
+
+MONITOR_MAX_BYTES = 16 << 20  # Rotate the sample file at 16 MiB
+MONITOR_BACKUP_COUNT = 5  # Rotated files kept as name.1 ... name.5
+MONITOR_BUFFER_SIZE = 1 << 16  # Bytes gathered before a write reaches the OS
+LOG_FORMATS = ("ndjson", "csv")
+
+
+def format_for_path(path):
+    """Log format implied by a file name: csv for .csv, otherwise ndjson."""
+    return "csv" if os.path.splitext(path)[1].lower() == ".csv" else "ndjson"
+
+
+class SampleLog:
+    """Buffered, size-rotated writer of monitoring samples."""
+
+    def __init__(self, path, points, fmt=None, max_bytes=MONITOR_MAX_BYTES,
+                 backup_count=MONITOR_BACKUP_COUNT, buffer_size=MONITOR_BUFFER_SIZE):
+        self.path = path
+        self.points = [tuple(point) for point in points]
+        self.fmt = fmt or format_for_path(path)
+        if self.fmt not in LOG_FORMATS:
+            raise ValueError(f"Unknown monitor log format: {self.fmt}")
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.buffer_size = buffer_size
+        self.stream = None
+        self.size = 0
+        self.open()
+
+    def header(self):
+        if self.fmt == "csv":
+            return "time," + ",".join(f"{x}:{y}" for x, y in self.points) + "\n"
+        return json.dumps({"points": self.points}) + "\n"
+
+    def open(self):
+        self.stream = open(self.path, "a", encoding="utf-8", newline="", buffering=self.buffer_size)
+        self.size = self.stream.tell()
+        if self.size == 0:
+            self.write_line(self.header())
+
+    def write_line(self, line):
+        self.stream.write(line)
+        self.size += len(line)
+
+    def write(self, timestamp, colors):
+        """Log one tick: a time.time() stamp and a packed color (or None) per point."""
+        if self.fmt == "csv":
+            line = f"{timestamp:.3f}," + ",".join(
+                "" if rgb is None else f"#{rgb:06X}" for rgb in colors) + "\n"
+        else:
+            line = json.dumps({
+                "time": round(timestamp, 3),
+                "colors": [None if rgb is None else f"#{rgb:06X}" for rgb in colors],
+            }) + "\n"
+        self.write_line(line)
+        if self.size >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        """Shift name.1 ... name.N up by one and start a fresh file."""
+        self.stream.close()
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{index}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{index + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.open()
+
+    def flush(self):
+        if self.stream is not None:
+            self.stream.flush()
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
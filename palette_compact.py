@@ -0,0 +1,82 @@
+"""Merge perceptually near-duplicate colors in the saved palette.
+
+Picks on antialiased edges land a unit or two away from each other, so the
+exact-RGB dedupe lets many visually identical colors pile up. Compaction
+clusters the palette greedily by ΔE: colors are visited most recently used
+first and each one either joins the nearest color kept so far, if that is
+within the threshold, or is kept itself. The kept colors live in a
+PaletteIndex, so every step is a nearest-neighbour query instead of a scan
+over all pairs. Kept free of Qt like palette_store.
+"""
+import logging
+
+from palette_index import PaletteIndex
+
+
+DEFAULT_THRESHOLD = 2.3  # ΔE76 of a just noticeable difference
+
+
+def cluster(rgbs, threshold=DEFAULT_THRESHOLD):
+    """Group packed colors, given most important first, by ΔE threshold.
+
+    Returns {kept rgb: [merged rgbs]} for the clusters that merge anything,
+    in the order the kept colors were first seen.
+    """
+    kept = PaletteIndex()
+    kept.reserve(len(rgbs))
+    merges = {}
+    for rgb in rgbs:
+        if rgb in kept:
+            continue
+        nearest = kept.nearest(rgb)
+        if nearest is not None and nearest[1] <= threshold:
+            merges.setdefault(nearest[0], []).append(rgb)
+        else:
+            kept.add(rgb)
+    return merges
+
+
+def plan_compaction(conn, threshold=DEFAULT_THRESHOLD):
+    """Return the merges compaction would make, keeping recently used colors."""
+    rows = conn.execute(
+        "SELECT rgb FROM colors ORDER BY last_used DESC, id DESC"
+    ).fetchall()
+    return cluster([rgb for (rgb,) in rows], threshold)
+
+
+def merged_count(merges):
+    """Number of colors a plan removes."""
+    return sum(len(merged) for merged in merges.values())
+
+
+def apply_compaction(conn, merges):
+    """Delete the merged colors in one transaction; return how many went."""
+    removed = [(rgb,) for merged in merges.values() for rgb in merged]
+    with conn:
+        conn.executemany("DELETE FROM colors WHERE rgb=?", removed)
+    logging.info("Compacted palette: merged %d colors into %d.", len(removed), len(merges))
+    return len(removed)
+
+
+def compact(conn, threshold=DEFAULT_THRESHOLD):
+    """Plan and apply a compaction; return the number of colors removed."""
+    return apply_compaction(conn, plan_compaction(conn, threshold))
+
+
+def describe(rgb, merged):
+    """One line summary of a merge, for previews."""
+    return "#{:06X} <- {}".format(rgb, " ".join("#{:06X}".format(other) for other in merged))
+
+
+def near_duplicate(index, rgb, threshold=DEFAULT_THRESHOLD):
+    """Return the saved color within threshold of rgb, if any, for dedupe on save.
+
+    Exact matches are returned too, so callers can treat both alike.
+    """
+    if rgb in index:
+        return rgb
+    nearest = index.nearest(rgb)
+    if nearest is not None and nearest[1] <= threshold:
+        return nearest[0]
+    return None
+
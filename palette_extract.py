@@ -0,0 +1,150 @@
+"""Dominant-palette extraction from image files.
+
+Pixels are quantized with a vectorized median cut over a 15-bit color
+histogram, so the cost is one pass over the (downsampled) pixels plus work
+proportional to the number of distinct histogram bins. Folders are spread
+across a process pool. Requires NumPy; images are decoded with QImage.
+"""
+import logging
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only extraction needs it
+    np = None
+
+
+EXTRACT_COLOR_COUNT = 8  # Colors returned per image by default
+MAX_SAMPLE_PIXELS = 1 << 18  # Larger images are subsampled down to about this many pixels
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp", ".tif", ".tiff")
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy is required for palette extraction (pip install numpy)")
+
+
+def load_image(path):
+    """Load an image file as a QImage in 32-bit RGB format."""
+    from PyQt5.QtGui import QImage
+    image = QImage(path)
+    if image.isNull():
+        raise ValueError(f"Cannot read image: {path}")
+    return image.convertToFormat(QImage.Format_RGB32)
+
+
+def image_to_array(image):
+    """Wrap a Format_RGB32 QImage as an (height, width, 3) RGB array without copying.
+
+    The array is a view on the image's memory and is only valid while the
+    image is alive and unmodified.
+    """
+    require_numpy()
+    height, width, stride = image.height(), image.width(), image.bytesPerLine()
+    bits = image.constBits()
+    bits.setsize(stride * height)
+    buffer = np.frombuffer(bits, dtype=np.uint8).reshape(height, stride // 4, 4)
+    # Format_RGB32 is stored as B, G, R, X bytes on little-endian machines
+    return buffer[:, :width, 2::-1]
+
+
+def subsample(pixels, max_pixels=MAX_SAMPLE_PIXELS):
+    """Return a strided view with at most about max_pixels pixels."""
+    height, width = pixels.shape[:2]
+    step = max(int(math.ceil(math.sqrt(height * width / max_pixels))), 1)
+    return pixels[::step, ::step]
+
+
+def median_cut(pixels, count=EXTRACT_COLOR_COUNT):
+    """Quantize an (..., 3) uint8 RGB array to at most count colors.
+
+    Returns a list of (packed rgb, fraction of pixels), most common first.
+    """
+    require_numpy()
+    rgb = pixels.reshape(-1, 3)
+    if rgb.size == 0:
+        return []
+    red = rgb[:, 0].astype(np.int64)
+    green = rgb[:, 1].astype(np.int64)
+    blue = rgb[:, 2].astype(np.int64)
+
+    # 5 bits per channel histogram, with per-bin channel sums for exact means
+    bins = ((red >> 3) << 10) | ((green >> 3) << 5) | (blue >> 3)
+    weights = np.bincount(bins, minlength=1 << 15)
+    occupied = np.nonzero(weights)[0]
+    weights = weights[occupied]
+    sums = np.stack([
+        np.bincount(bins, weights=channel, minlength=1 << 15)[occupied]
+        for channel in (red, green, blue)
+    ], axis=1)
+    coords = np.stack([(occupied >> 10) & 31, (occupied >> 5) & 31, occupied & 31], axis=1)
+
+    # Repeatedly split the most populous splittable box at its weighted median
+    boxes = [np.arange(len(occupied))]
+    while len(boxes) < count:
+        candidates = [(weights[box].sum(), index) for index, box in enumerate(boxes) if len(box) > 1]
+        if not candidates:
+            break
+        index = max(candidates)[1]
+        box = boxes[index]
+        box_coords = coords[box]
+        axis = int(np.argmax(box_coords.max(axis=0) - box_coords.min(axis=0)))
+        ordered = box[np.argsort(box_coords[:, axis], kind="stable")]
+        cumulative = np.cumsum(weights[ordered])
+        split = int(np.searchsorted(cumulative, cumulative[-1] / 2.0)) + 1
+        split = min(max(split, 1), len(ordered) - 1)
+        boxes[index] = ordered[:split]
+        boxes.append(ordered[split:])
+
+    total = float(weights.sum())
+    palette = []
+    for box in boxes:
+        population = weights[box].sum()
+        mean = np.rint(sums[box].sum(axis=0) / population).astype(int)
+        palette.append(((int(mean[0]) << 16) | (int(mean[1]) << 8) | int(mean[2]), float(population / total)))
+    palette.sort(key=lambda entry: entry[1], reverse=True)
+    return palette
+
+
+def extract_file(path, count=EXTRACT_COLOR_COUNT):
+    """Return the dominant (packed rgb, fraction) colors of an image file."""
+    image = load_image(path)
+    return median_cut(subsample(image_to_array(image)), count)
+
+
+def image_files(folder):
+    """List the image files directly inside a folder, sorted by name."""
+    return [
+        os.path.join(folder, name) for name in sorted(os.listdir(folder))
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+
+
+def extract_files(paths, count=EXTRACT_COLOR_COUNT, processes=None):
+    """Extract palettes from many images in parallel.
+
+    Returns a list of (path, palette) in input order; palette is None for
+    images that could not be read.
+    """
+    require_numpy()
+    paths = list(paths)
+    if len(paths) <= 1:
+        # Not worth starting a pool for a single image
+        return [(path, call_logged(extract_file, path, count)) for path in paths]
+    # Spawn, not fork: the GUI process has Qt and writer threads a fork would copy mid-state
+    with ProcessPoolExecutor(max_workers=processes,
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(extract_file, path, count) for path in paths]
+        return [(path, call_logged(future.result)) for path, future in zip(paths, futures)]
+
+
+def call_logged(function, *args):
+    """Call function, logging and returning None if it raises."""
+    try:
+        return function(*args)
+    except Exception as e:
+        logging.warning("Could not extract a palette: %s", str(e))
+        return None
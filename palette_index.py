@@ -0,0 +1,215 @@
+"""Spatial index for nearest-color lookups over a palette in Lab space."""
+import math
+
+from color_space import rgb_to_lab
+
+
+GAMUT_VOLUME = 8.2e5  # Approximate volume of the sRGB gamut in Lab units
+COLORS_PER_CELL = 2  # Target bucket occupancy when sizing the grid
+MIN_CELL_SIZE = 2.0  # Bounds on the edge of a grid bucket in Lab units (ΔE)
+MAX_CELL_SIZE = 16.0
+BRUTE_FORCE_LIMIT = 256  # Below this many colors a linear scan is faster
+CACHE_LIMIT = 4096  # Memoized queries kept between palette changes
+
+
+def cell_size_for(count):
+    """Bucket edge giving about COLORS_PER_CELL colors per occupied bucket."""
+    size = (GAMUT_VOLUME * COLORS_PER_CELL / max(count, 1)) ** (1.0 / 3.0)
+    return min(max(size, MIN_CELL_SIZE), MAX_CELL_SIZE)
+
+
+class PaletteIndex:
+    """Grid-bucket index answering "closest saved color" queries.
+
+    Colors are bucketed by their Lab coordinates into cubes sized for the
+    palette. A query searches shells of buckets outwards from its own bucket
+    and stops once no unvisited bucket can hold anything closer. Adding or
+    removing a color only touches its bucket, so the index follows the
+    palette incrementally; the buckets are only resized when the palette has
+    grown or shrunk by a factor of four.
+    """
+
+    def __init__(self, colors=()):
+        self.cell_size = cell_size_for(0)
+        self.sized_for = 0  # Palette size the current cell size was chosen for
+        self.cells = {}  # (i, j, k) -> list of (rgb, lab)
+        self.keys = {}  # rgb -> (i, j, k)
+        self.cache = {}  # Query rgb -> (nearest rgb, ΔE)
+        self.rebuild(colors)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, rgb):
+        return rgb in self.keys
+
+    def cell_key(self, lab):
+        size = self.cell_size
+        return (int(math.floor(lab[0] / size)),
+                int(math.floor(lab[1] / size)),
+                int(math.floor(lab[2] / size)))
+
+    def rebuild(self, colors):
+        """Replace the indexed colors."""
+        self.rebucket([(rgb, rgb_to_lab(rgb)) for rgb in set(colors)])
+
+    def reserve(self, count):
+        """Size the buckets for a palette about to grow to count colors.
+
+        Avoids the intermediate resizes when colors are then added one by one.
+        """
+        if count > self.sized_for:
+            self.rebucket([entry for bucket in self.cells.values() for entry in bucket], count)
+
+    def rebucket(self, entries, sized_for=None):
+        """Bucket (rgb, lab) entries with a cell size chosen for their count."""
+        self.sized_for = max(len(entries), sized_for or 0)
+        self.cell_size = cell_size_for(self.sized_for)
+        self.cells = {}
+        self.keys = {}
+        self.cache = {}
+        for rgb, lab in entries:
+            key = self.cell_key(lab)
+            self.cells.setdefault(key, []).append((rgb, lab))
+            self.keys[rgb] = key
+
+    def resize_if_needed(self, growing):
+        count = len(self.keys)
+        if growing:
+            resize = count > 4 * max(self.sized_for, BRUTE_FORCE_LIMIT)
+        else:
+            resize = self.sized_for > BRUTE_FORCE_LIMIT and 4 * count < self.sized_for
+        if resize:
+            self.rebucket([entry for bucket in self.cells.values() for entry in bucket])
+
+    def add(self, rgb):
+        """Index a packed color; does nothing if it is already indexed."""
+        if rgb in self.keys:
+            return
+        lab = rgb_to_lab(rgb)
+        key = self.cell_key(lab)
+        self.cells.setdefault(key, []).append((rgb, lab))
+        self.keys[rgb] = key
+        self.cache = {}
+        self.resize_if_needed(growing=True)
+
+    def remove(self, rgb):
+        """Drop a packed color from the index."""
+        key = self.keys.pop(rgb, None)
+        if key is None:
+            return
+        bucket = self.cells[key]
+        for position, entry in enumerate(bucket):
+            if entry[0] == rgb:
+                del bucket[position]
+                break
+        if not bucket:
+            del self.cells[key]
+        self.cache = {}
+        self.resize_if_needed(growing=False)
+
+    def nearest(self, rgb):
+        """Return (nearest rgb, ΔE) for a packed color, or None if empty."""
+        cached = self.cache.get(rgb)
+        if cached is not None:
+            return cached
+        if not self.keys:
+            return None
+
+        lab = rgb_to_lab(rgb)
+        if len(self.keys) <= BRUTE_FORCE_LIMIT:
+            best = self.scan(self.cells.values(), lab, None, math.inf)
+        else:
+            best = self.search(lab)
+
+        if len(self.cache) >= CACHE_LIMIT:
+            self.cache = {}
+        self.cache[rgb] = best
+        return best
+
+    def scan(self, buckets, lab, best, best_sq):
+        """Linear scan over buckets, returning the improved (rgb, ΔE)."""
+        l0, a0, b0 = lab
+        best_rgb = best[0] if best else None
+        for bucket in buckets:
+            for rgb, (l1, a1, b1) in bucket:
+                dist_sq = (l1 - l0) ** 2 + (a1 - a0) ** 2 + (b1 - b0) ** 2
+                if dist_sq < best_sq:
+                    best_sq = dist_sq
+                    best_rgb = rgb
+        return best_rgb, math.sqrt(best_sq)
+
+    def shell(self, center, radius):
+        """Yield the occupied buckets at Chebyshev distance radius from center."""
+        ci, cj, ck = center
+        cells = self.cells
+        if radius == 0:
+            bucket = cells.get(center)
+            if bucket:
+                yield bucket
+            return
+        for di in range(-radius, radius + 1):
+            on_i_face = di == -radius or di == radius
+            for dj in range(-radius, radius + 1):
+                if on_i_face or dj == -radius or dj == radius:
+                    dks = range(-radius, radius + 1)
+                else:
+                    dks = (-radius, radius)
+                for dk in dks:
+                    bucket = cells.get((ci + di, cj + dj, ck + dk))
+                    if bucket:
+                        yield bucket
+
+    def search(self, lab):
+        """Shell search outwards from the query's bucket."""
+        size = self.cell_size
+        center = self.cell_key(lab)
+        # Distance from the query to the nearest face of its own bucket
+        margin = min(min(value - key * size, (key + 1) * size - value)
+                     for value, key in zip(lab, center))
+        best = None
+        best_sq = math.inf
+        radius = 0
+        while True:
+            # Once a shell would cost more than visiting every occupied
+            # bucket, finish with a pruned scan over all of them instead.
+            if 24 * radius * radius > len(self.cells):
+                return self.scan_remaining(lab, center, radius, best, best_sq)
+            best = self.scan(self.shell(center, radius), lab, best, best_sq)
+            best_sq = best[1] ** 2 if best[0] is not None else math.inf
+            # Anything in an unvisited bucket is at least this far away
+            if best[0] is not None and best[1] <= margin + radius * size:
+                return best
+            radius += 1
+
+    def box_distance_sq(self, lab, key):
+        """Squared distance from a Lab point to the nearest point of a bucket."""
+        size = self.cell_size
+        total = 0.0
+        for value, index in zip(lab, key):
+            low = index * size
+            if value < low:
+                total += (low - value) ** 2
+            elif value > low + size:
+                total += (value - low - size) ** 2
+        return total
+
+    def scan_remaining(self, lab, center, radius, best, best_sq):
+        """Scan the buckets outside the searched shells, nearest first."""
+        ci, cj, ck = center
+        candidates = []
+        for key, bucket in self.cells.items():
+            if max(abs(key[0] - ci), abs(key[1] - cj), abs(key[2] - ck)) < radius:
+                continue
+            bound_sq = self.box_distance_sq(lab, key)
+            if bound_sq < best_sq:
+                candidates.append((bound_sq, bucket))
+        candidates.sort(key=lambda candidate: candidate[0])
+        for bound_sq, bucket in candidates:
+            if bound_sq >= best_sq:
+                break
+            best = self.scan((bucket,), lab, best, best_sq)
+            best_sq = best[1] ** 2
+        if best is None or best[0] is None:
+            return None
+        return best
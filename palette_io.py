@@ -0,0 +1,373 @@
+"""Streaming import and export of palettes in common file formats.
+
+Supported formats, chosen by file extension:
+
+- .gpl   GIMP palette
+- .ase   Adobe Swatch Exchange
+- .css   CSS custom properties (--name: #RRGGBB;)
+- .json  JSON array of "#RRGGBB" strings, [r, g, b] lists or {"hex": ...} objects
+- .csv   CSV with a hex column or red, green, blue columns
+
+Readers yield packed 0xRRGGBB integers one at a time and writers consume any
+iterable, so neither side holds a whole palette in memory. Readers yield None
+for a malformed entry or one with a channel outside 0-255; read_colors()
+leaves those out and counts them.
+"""
+import csv
+import itertools
+import json
+import logging
+import os
+import re
+import struct
+import time
+
+from color_space import lab_to_rgb
+from palette_store import ORDER_BY, UPSERT_SQL, unpack_rgb
+
+
+FORMATS = ("gpl", "ase", "css", "json", "csv")
+IMPORT_CHUNK_SIZE = 10000  # Rows per executemany call during import
+IMPORT_CACHE_KIB = 65536  # SQLite page cache while importing, for the random index inserts
+READ_BUFFER_SIZE = 1 << 16
+
+HEX_DIGITS_PATTERN = re.compile(r"[0-9A-Fa-f]+")
+HEX_PATTERN = re.compile(r"#([0-9A-Fa-f]{8}|[0-9A-Fa-f]{6}|[0-9A-Fa-f]{3,4})\b")
+RGB_FUNCTION_PATTERN = re.compile(
+    r"rgba?\(\s*(\d{1,3})[\s,]+(\d{1,3})[\s,]+(\d{1,3})", re.IGNORECASE
+)
+CSS_VARIABLE_PATTERN = re.compile(r"--[\w-]+\s*:\s*([^;}]+)")
+
+
+def detect_format(path):
+    """Return the palette format for a file name, based on its extension."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension not in FORMATS:
+        raise ValueError(f"Unsupported palette format: .{extension}")
+    return extension
+
+
+def parse_hex(text):
+    """Parse #RGB, #RGBA, #RRGGBB or #RRGGBBAA (alpha ignored) into a packed color."""
+    digits = text.strip().lstrip("#")
+    if not HEX_DIGITS_PATTERN.fullmatch(digits):
+        raise ValueError(f"Not a hex color: {text!r}")
+    if len(digits) in (3, 4):
+        digits = "".join(c * 2 for c in digits[:3])
+    elif len(digits) in (6, 8):
+        digits = digits[:6]
+    else:
+        raise ValueError(f"Not a hex color: {text!r}")
+    return int(digits, 16)
+
+
+def parse_css_color(text):
+    """Parse a CSS hex or rgb()/rgba() color, or return None."""
+    match = HEX_PATTERN.search(text)
+    if match:
+        return parse_hex(match.group(1))
+    match = RGB_FUNCTION_PATTERN.search(text)
+    if match:
+        red, green, blue = (min(int(v), 255) for v in match.groups())
+        return (red << 16) | (green << 8) | blue
+    return None
+
+
+def pack_channels(red, green, blue):
+    """Pack integer channels, rejecting any outside 0-255."""
+    red, green, blue = int(red), int(green), int(blue)
+    if not (0 <= red <= 255 and 0 <= green <= 255 and 0 <= blue <= 255):
+        raise ValueError(f"Channel out of range: {red}, {green}, {blue}")
+    return (red << 16) | (green << 8) | blue
+
+
+def channel(value):
+    """Clamp a 0-1 float to an 8-bit channel value."""
+    return min(max(int(round(value * 255)), 0), 255)
+
+
+# Readers
+
+def read_gpl(stream):
+    for line in stream:
+        line = line.strip()
+        if not line or line.startswith("#") or line == "GIMP Palette" or \
+           line.startswith(("Name:", "Columns:")):
+            continue
+        parts = line.split(None, 3)
+        try:
+            if len(parts) < 3:
+                raise ValueError(f"Not a palette entry: {line!r}")
+            yield pack_channels(*parts[:3])
+        except ValueError:
+            yield None
+
+
+def read_ase(stream):
+    if stream.read(4) != b"ASEF":
+        raise ValueError("Not an Adobe Swatch Exchange file")
+    _version_major, _version_minor, block_count = struct.unpack(">HHI", stream.read(8))
+    for _ in range(block_count):
+        header = stream.read(6)
+        if len(header) < 6:
+            break
+        block_type, length = struct.unpack(">HI", header)
+        block = stream.read(length)
+        if block_type != 0x0001:  # Group start/end blocks carry no color
+            continue
+        name_length = struct.unpack(">H", block[:2])[0]
+        offset = 2 + name_length * 2
+        model = block[offset:offset + 4]
+        offset += 4
+        if model == b"RGB ":
+            r, g, b = struct.unpack(">fff", block[offset:offset + 12])
+            yield (channel(r) << 16) | (channel(g) << 8) | channel(b)
+        elif model == b"CMYK":
+            c, m, y, k = struct.unpack(">ffff", block[offset:offset + 16])
+            yield (channel((1 - c) * (1 - k)) << 16) | (channel((1 - m) * (1 - k)) << 8) | \
+                channel((1 - y) * (1 - k))
+        elif model == b"Gray":
+            gray = channel(struct.unpack(">f", block[offset:offset + 4])[0])
+            yield (gray << 16) | (gray << 8) | gray
+        elif model == b"LAB ":
+            l, a, b = struct.unpack(">fff", block[offset:offset + 12])
+            yield lab_to_rgb((l * 100, a, b))
+
+
+def read_css(stream):
+    for line in stream:
+        for value in CSS_VARIABLE_PATTERN.findall(line):
+            rgb = parse_css_color(value)
+            if rgb is not None:
+                yield rgb
+
+
+def json_item_color(item):
+    """Interpret one element of a JSON palette array."""
+    if isinstance(item, str):
+        return parse_hex(item)
+    if isinstance(item, list) and len(item) >= 3:
+        return pack_channels(*item[:3])
+    if isinstance(item, dict):
+        if "hex" in item:
+            return parse_hex(item["hex"])
+        return pack_channels(item["red"], item["green"], item["blue"])
+    raise ValueError(f"Unsupported JSON palette entry: {item!r}")
+
+
+def read_json(stream):
+    """Decode a top-level JSON array one element at a time."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    started = False
+    while True:
+        # Skip whitespace and separators before the next element
+        while True:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position < len(buffer):
+                break
+            chunk = stream.read(READ_BUFFER_SIZE)
+            if not chunk:
+                return
+            buffer = chunk
+            position = 0
+        if not started:
+            if buffer[position] != "[":
+                raise ValueError("JSON palette must be a top-level array")
+            started = True
+            position += 1
+            continue
+        if buffer[position] == "]":
+            return
+        # Decode the next element, reading more input if it is incomplete
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+                break
+            except json.JSONDecodeError:
+                chunk = stream.read(READ_BUFFER_SIZE)
+                if not chunk:
+                    raise
+                buffer = buffer[position:] + chunk
+                position = 0
+        position = end
+        try:
+            yield json_item_color(item)
+        except (ValueError, TypeError, KeyError):
+            yield None
+
+
+def read_csv(stream):
+    reader = csv.reader(stream)
+    columns = None
+    for row in reader:
+        if not row:
+            continue
+        if columns is None:
+            header = [cell.strip().lower() for cell in row]
+            if "hex" in header or "red" in header:
+                columns = header
+                continue
+            columns = []
+        cells = dict(zip(columns, row)) if columns else {}
+        try:
+            if "hex" in cells:
+                rgb = parse_hex(cells["hex"])
+            elif "red" in cells:
+                rgb = pack_channels(cells["red"], cells["green"], cells["blue"])
+            elif row[0].strip().startswith("#"):
+                rgb = parse_hex(row[0])
+            elif len(row) >= 3:
+                rgb = pack_channels(*row[:3])
+            else:
+                raise ValueError(f"Not a palette row: {row!r}")
+        except (ValueError, KeyError):
+            rgb = None
+        yield rgb
+
+
+READERS = {"gpl": read_gpl, "ase": read_ase, "css": read_css, "json": read_json, "csv": read_csv}
+
+
+def read_colors(path, fmt=None, stats=None):
+    """Yield the packed colors stored in a palette file.
+
+    Malformed or out-of-range entries are skipped; if stats is a dict, their
+    number is stored in stats["skipped"].
+    """
+    fmt = fmt or detect_format(path)
+    if stats is None:
+        stats = {}
+    stats["skipped"] = 0
+    if fmt == "ase":
+        stream = open(path, "rb", buffering=READ_BUFFER_SIZE)
+        colors = read_ase(stream)
+    else:
+        stream = open(path, "r", encoding="utf-8", newline="")
+        colors = READERS[fmt](stream)
+    with stream:
+        for rgb in colors:
+            if rgb is None:
+                stats["skipped"] += 1
+            else:
+                yield rgb
+
+
+# Writers
+
+def write_gpl(stream, colors, name):
+    stream.write(f"GIMP Palette\nName: {name}\nColumns: 6\n#\n")
+    for rgb in colors:
+        red, green, blue = unpack_rgb(rgb)
+        stream.write(f"{red:3d} {green:3d} {blue:3d}\t#{rgb:06X}\n")
+
+
+def write_ase(stream, colors, name):
+    stream.write(b"ASEF" + struct.pack(">HHI", 1, 0, 0))
+    count = 0
+    for rgb in colors:
+        swatch_name = f"#{rgb:06X}\0".encode("utf-16-be")
+        red, green, blue = unpack_rgb(rgb)
+        body = struct.pack(">H", len(swatch_name) // 2) + swatch_name + b"RGB " + \
+            struct.pack(">fffH", red / 255, green / 255, blue / 255, 2)  # 2 = normal
+        stream.write(struct.pack(">HI", 0x0001, len(body)) + body)
+        count += 1
+    # The block count is only known at the end; patch it into the header
+    stream.seek(8)
+    stream.write(struct.pack(">I", count))
+
+
+def write_css(stream, colors, name):
+    stream.write(f"/* {name} */\n:root {{\n")
+    for number, rgb in enumerate(colors, 1):
+        stream.write(f"  --color-{number}: #{rgb:06X};\n")
+    stream.write("}\n")
+
+
+def write_json(stream, colors, name):
+    stream.write("[")
+    separator = "\n  "
+    for rgb in colors:
+        stream.write(f'{separator}"#{rgb:06X}"')
+        separator = ",\n  "
+    stream.write("\n]\n")
+
+
+def write_csv(stream, colors, name):
+    writer = csv.writer(stream, lineterminator="\n")
+    writer.writerow(("hex", "red", "green", "blue"))
+    for rgb in colors:
+        writer.writerow((f"#{rgb:06X}",) + unpack_rgb(rgb))
+
+
+WRITERS = {"gpl": write_gpl, "ase": write_ase, "css": write_css, "json": write_json, "csv": write_csv}
+
+
+def write_colors(path, colors, fmt=None, name="TSTP Color Picker"):
+    """Write packed colors from any iterable to a palette file."""
+    fmt = fmt or detect_format(path)
+    if fmt == "ase":
+        with open(path, "wb") as stream:
+            WRITERS[fmt](stream, colors, name)
+    else:
+        with open(path, "w", encoding="utf-8", newline="") as stream:
+            WRITERS[fmt](stream, colors, name)
+
+
+# Database
+
+def iter_saved_colors(conn):
+    """Yield packed saved colors straight from a database cursor."""
+    for (rgb,) in conn.execute(f"SELECT rgb FROM colors {ORDER_BY}"):
+        yield rgb
+
+
+def import_palette(conn, path, fmt=None, chunk_size=IMPORT_CHUNK_SIZE, stats=None):
+    """Stream a palette file into the colors table in one transaction.
+
+    Colors keep their file order after any existing ones; colors that are
+    already saved are moved to the end. Returns the number of colors read;
+    if stats is a dict, the number of skipped entries is stored in
+    stats["skipped"].
+    """
+    base = time.time()
+    if stats is None:
+        stats = {}
+    rows = (
+        unpack_rgb(rgb) + (rgb, base + number * 1e-6)
+        for number, rgb in enumerate(read_colors(path, fmt, stats))
+    )
+    count = 0
+    cache_size = conn.execute("PRAGMA cache_size").fetchone()[0]
+    conn.execute(f"PRAGMA cache_size = -{IMPORT_CACHE_KIB}")
+    try:
+        with conn:
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+                conn.executemany(UPSERT_SQL, chunk)
+                count += len(chunk)
+    finally:
+        conn.execute(f"PRAGMA cache_size = {cache_size}")
+    logging.info("Imported %d colors from %s.", count, path)
+    if stats["skipped"]:
+        logging.warning("Skipped %d malformed or out-of-range entries in %s.", stats["skipped"], path)
+    return count
+
+
+def export_palette(conn, path, fmt=None):
+    """Stream the saved palette into a file; return the number of colors."""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for rgb in iter_saved_colors(conn):
+            count += 1
+            yield rgb
+
+    write_colors(path, counted(), fmt)
+    logging.info("Exported %d colors to %s.", count, path)
+    return count
@@ -0,0 +1,242 @@
+"""SQLite storage for the saved color palette.
+
+Kept free of Qt so the database can be used without a GUI.
+"""
+import sqlite3
+import time
+import queue
+import threading
+import logging
+
+from metrics import METRICS
+
+
+DATABASE_PATH = "colors.db"
+WRITE_BATCH_INTERVAL = 0.05  # Seconds to gather writes into one transaction
+WRITER_FLUSH_TIMEOUT = 5.0  # Longest the GUI waits for queued writes
+
+# Version 1 is the original unindexed table of red/green/blue rows.
+# Version 2 adds the packed RGB value with a unique index and last_used ordering.
+SCHEMA_VERSION = 2
+
+# Colors are listed oldest first, most recently used last
+ORDER_BY = "ORDER BY last_used, id"
+
+UPSERT_SQL = """
+    INSERT INTO colors (red, green, blue, rgb, last_used) VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(rgb) DO UPDATE SET last_used = excluded.last_used
+"""
+
+
+def pack_rgb(red, green, blue):
+    """Pack 8-bit channels into a 24-bit 0xRRGGBB integer."""
+    return (red << 16) | (green << 8) | blue
+
+
+def unpack_rgb(rgb):
+    """Split a 24-bit 0xRRGGBB integer into (red, green, blue)."""
+    return (rgb >> 16) & 0xFF, (rgb >> 8) & 0xFF, rgb & 0xFF
+
+
+def create_schema(conn):
+    """Create the current colors table and its indexes."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS colors (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            red INTEGER NOT NULL,
+            green INTEGER NOT NULL,
+            blue INTEGER NOT NULL,
+            rgb INTEGER NOT NULL,
+            last_used REAL NOT NULL
+        )
+    """)
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS colors_rgb ON colors (rgb)")
+    conn.execute("CREATE INDEX IF NOT EXISTS colors_last_used ON colors (last_used, id)")
+
+
+def migrate(conn):
+    """Bring the database up to SCHEMA_VERSION in place.
+
+    The version is checked again under a write lock, so two processes
+    opening an old database at once migrate it only once.
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(colors)")}
+        if columns and "rgb" not in columns:
+            # Collapse duplicates onto their newest row and keep the old id
+            # order as last_used, so existing colors stay before new picks.
+            conn.execute("ALTER TABLE colors RENAME TO colors_v1")
+            create_schema(conn)
+            conn.execute("""
+                INSERT INTO colors (id, red, green, blue, rgb, last_used)
+                SELECT MAX(id), red, green, blue,
+                       (red << 16) | (green << 8) | blue, MAX(id)
+                FROM colors_v1
+                GROUP BY red, green, blue
+            """)
+            conn.execute("DROP TABLE colors_v1")
+            logging.info("Migrated colors table from schema version %d to %d.", version, SCHEMA_VERSION)
+        else:
+            # New database, or a current table whose version was never recorded
+            create_schema(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+
+def connect(path=DATABASE_PATH):
+    """Open the palette database in WAL mode, migrating it if needed."""
+    conn = sqlite3.connect(path)
+    # WAL lets readers carry on while the writer thread commits
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    migrate(conn)
+    return conn
+
+
+def save_color(cursor, red, green, blue, used_at=None):
+    """Insert a color, or bump an existing one to the end; return its id.
+
+    Does not commit.
+    """
+    rgb = pack_rgb(red, green, blue)
+    cursor.execute(UPSERT_SQL, (red, green, blue, rgb, time.time() if used_at is None else used_at))
+    return cursor.execute("SELECT id FROM colors WHERE rgb=?", (rgb,)).fetchone()[0]
+
+
+class PaletteWriter:
+    """Write-behind queue that applies palette changes on a background thread.
+
+    The thread owns its own connection. Writes queued within `interval`
+    seconds of each other are applied in a single transaction, so callers
+    never wait on disk I/O and a burst of picks costs one commit.
+
+    If the database cannot be opened or a batch fails, on_error is called
+    with a message from the writer thread, so callers whose view already
+    shows the changes can reload it.
+    """
+
+    def __init__(self, path=DATABASE_PATH, interval=WRITE_BATCH_INTERVAL, on_error=None):
+        self.path = path
+        self.interval = interval
+        self.on_error = on_error
+        self.queue = queue.Queue()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name="palette-writer", daemon=True)
+        self.thread.start()
+
+    def save(self, red, green, blue):
+        """Queue an insert, or a bump to the end for an existing color."""
+        self.queue.put(("save", (red, green, blue, pack_rgb(red, green, blue), time.time())))
+
+    def remove(self, red, green, blue):
+        """Queue the removal of a color."""
+        self.queue.put(("remove", pack_rgb(red, green, blue)))
+
+    def call(self, function, callback=None):
+        """Queue function(conn) to run on the writer's connection.
+
+        It runs after every write queued before it, in its own transactions,
+        so bulk rewrites such as an import never touch a GUI connection.
+        callback(result, error) is called from the writer thread afterwards.
+        """
+        self.queue.put(("call", (function, callback)))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far is committed.
+
+        Returns False on timeout or if the writer thread is no longer running.
+        """
+        if self.closed:
+            return True
+        if not self.thread.is_alive():
+            return False
+        done = threading.Event()
+        self.queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def report(self, message):
+        logging.error("%s", message)
+        if self.on_error is not None:
+            try:
+                self.on_error(message)
+            except Exception as e:
+                logging.error("Error reporting palette writer failure: %s", str(e))
+
+    def close(self, timeout=None):
+        """Commit pending writes and stop the thread."""
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(("close", None))
+        self.thread.join(timeout)
+
+    def next_batch(self):
+        """Wait for a write, then gather whatever follows within the interval."""
+        batch = [self.queue.get()]
+        deadline = time.monotonic() + self.interval
+        while batch[-1][0] not in ("flush", "close", "call"):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def apply(self, conn, batch):
+        """Apply one batch of writes in a single transaction."""
+        started = METRICS.start()
+        writes = 0
+        with conn:
+            for kind, payload in batch:
+                if kind == "save":
+                    conn.execute(UPSERT_SQL, payload)
+                    writes += 1
+                elif kind == "remove":
+                    conn.execute("DELETE FROM colors WHERE rgb=?", (payload,))
+                    writes += 1
+        if writes:
+            METRICS.stop("sqlite.commit", started)
+
+    def run_call(self, conn, function, callback):
+        result, error = None, None
+        try:
+            result = function(conn)
+        except Exception as e:
+            logging.error("Error in palette writer job: %s", str(e))
+            error = e
+        if callback is not None:
+            try:
+                callback(result, error)
+            except Exception as e:
+                logging.error("Error reporting palette writer job: %s", str(e))
+
+    def run(self):
+        conn = None
+        try:
+            conn = connect(self.path)
+            while True:
+                batch = self.next_batch()
+                try:
+                    self.apply(conn, batch)
+                except Exception as e:
+                    self.report(f"Error writing {len(batch)} palette changes: {e}")
+                for kind, payload in batch:
+                    if kind == "flush":
+                        payload.set()
+                    elif kind == "call":
+                        self.run_call(conn, *payload)
+                if batch[-1][0] == "close":
+                    return
+        except Exception as e:
+            self.report(f"Palette writer stopped: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
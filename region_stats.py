@@ -0,0 +1,71 @@
+"""Mean, median and dominant color of a block of pixels.
+
+Single pixels are noisy on dithered, antialiased or gradient UI, so region
+sampling summarizes a whole rectangle instead. Pixels come in as the
+(height, width, 3) RGB view that palette_extract.image_to_array puts over a
+QImage without copying; every statistic is computed with NumPy in a few
+passes over that view. Requires NumPy.
+"""
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only region sampling needs it
+    np = None
+
+
+STATISTICS = ("mean", "median", "dominant")
+DOMINANT_BITS = 5  # Bits per channel of the histogram the dominant color is read from
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("NumPy is required for region sampling (pip install numpy)")
+
+
+def pack(channels):
+    red, green, blue = (int(value) for value in channels)
+    return (red << 16) | (green << 8) | blue
+
+
+def channel_medians(pixels):
+    """Per-channel medians, read from 256-bin histograms instead of sorting."""
+    count = pixels.shape[0] * pixels.shape[1]
+    medians = []
+    for channel in range(3):
+        histogram = np.bincount(pixels[..., channel].ravel(), minlength=256)
+        medians.append(int(np.searchsorted(np.cumsum(histogram), (count + 1) // 2)))
+    return medians
+
+
+def dominant(pixels):
+    """Mean of the pixels in the most populated bin of a coarse color histogram."""
+    shift = 8 - DOMINANT_BITS
+    red = pixels[..., 0].ravel().astype(np.int32)
+    green = pixels[..., 1].ravel().astype(np.int32)
+    blue = pixels[..., 2].ravel().astype(np.int32)
+    bins = ((red >> shift) << (2 * DOMINANT_BITS)) | ((green >> shift) << DOMINANT_BITS) | (blue >> shift)
+    top = np.argmax(np.bincount(bins, minlength=1 << (3 * DOMINANT_BITS)))
+    members = bins == top
+    return [int(round(channel[members].mean())) for channel in (red, green, blue)]
+
+
+def region_statistics(pixels):
+    """Return {"mean", "median", "dominant": packed rgb} for an (h, w, 3) uint8 array.
+
+    Returns None for an empty region.
+    """
+    require_numpy()
+    count = pixels.shape[0] * pixels.shape[1]
+    if count == 0:
+        return None
+    sums = pixels.sum(axis=(0, 1), dtype=np.int64)
+    mean = [int(round(total / count)) for total in sums.tolist()]
+    return {
+        "mean": pack(mean),
+        "median": pack(channel_medians(pixels)),
+        "dominant": pack(dominant(pixels)),
+    }
+
+
+def describe(statistics):
+    """Multi-line readout of region statistics."""
+    return "\n".join(f"{name.capitalize():<9}#{statistics[name]:06X}" for name in STATISTICS)
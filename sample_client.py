@@ -0,0 +1,120 @@
+"""Client for the sampling service of a running color picker.
+
+The tray app can serve color samples to scripts and test harnesses over a
+local socket (a Unix domain socket, or a named pipe on Windows). The
+protocol is newline-delimited JSON: each request is one JSON object per
+line and gets exactly one response line, in order, so a client may send any
+number of requests before reading the answers.
+
+    {"op": "sample", "x": 10, "y": 20}         -> {"ok": true, "color": "#RRGGBB"}
+    {"op": "sample_many", "points": [[x, y]]}  -> {"ok": true, "colors": ["#RRGGBB", null]}
+    {"op": "palette"}                          -> {"ok": true, "colors": [...]}
+    {"op": "nearest", "color": "#RRGGBB"}      -> {"ok": true, "color": ..., "delta_e": ...}
+    {"op": "subscribe"} / {"op": "unsubscribe"}
+    {"op": "ping"}
+
+While subscribed, overlay samples arrive as extra lines of the form
+{"event": "sample", "color": ..., "x": ..., "y": ..., "time": ...}; a client
+that stops reading misses events rather than queueing them without bound.
+Until the saved palette has finished loading, "palette" and "nearest" answer
+{"ok": false, "loading": true, ...}. An "id" field in a request is echoed in
+its response. Kept free of Qt so clients start quickly.
+
+On Unix the socket lives in $XDG_RUNTIME_DIR, or else in a directory under
+the temp dir that only the current user can enter.
+"""
+import getpass
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+
+
+SERVICE_ENV = "COLOR_PICKER_SERVICE"  # Set to 1 to start the service with the app
+
+
+def service_name():
+    """Name of the current user's service socket."""
+    return f"tstp-color-picker-{getpass.getuser()}"
+
+
+def private_directory():
+    """The current user's runtime directory, created 0700 under the temp dir if unset.
+
+    Raises PermissionError if the fallback directory belongs to someone else
+    or other users can reach into it.
+    """
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return runtime
+    path = os.path.join(tempfile.gettempdir(), service_name())
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"Unsafe service directory: {path}")
+    return path
+
+
+def service_address():
+    """Address the server listens on: a socket path, or a pipe name on Windows."""
+    if sys.platform == "win32":
+        return service_name()
+    return os.path.join(private_directory(), service_name() + ".sock")
+
+
+class SampleClient:
+    """Persistent connection to the sampling service."""
+
+    def __init__(self, address=None, timeout=5.0):
+        address = address or service_address()
+        if sys.platform == "win32":
+            self.socket = None
+            self.stream = open(r"\\.\pipe\{}".format(address), "r+b", buffering=0)
+            self.reader = os.fdopen(os.dup(self.stream.fileno()), "rb")
+        else:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.settimeout(timeout)
+            self.socket.connect(address)
+            self.stream = self.socket.makefile("wb")
+            self.reader = self.socket.makefile("rb")
+
+    def close(self):
+        self.stream.close()
+        self.reader.close()
+        if self.socket is not None:
+            self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def send(self, requests):
+        """Write requests without waiting for their responses."""
+        self.stream.write(b"".join(json.dumps(request).encode("utf-8") + b"\n" for request in requests))
+        self.stream.flush()
+
+    def receive(self):
+        """Read the next response or event line."""
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Sampling service closed the connection")
+        return json.loads(line)
+
+    def pipeline(self, requests):
+        """Send every request at once, then return their responses in order.
+
+        Not for subscribed connections, whose event lines interleave.
+        """
+        requests = list(requests)
+        self.send(requests)
+        return [self.receive() for _ in requests]
+
+    def request(self, request):
+        return self.pipeline([request])[0]
@@ -0,0 +1,65 @@
+"""Fixed-size history of the colors hovered in the overlay.
+
+The overlay records every sample it takes, so this is written to be cheap at
+tick rate: colors and timestamps live in two preallocated arrays used as a
+ring buffer, and a sample that repeats the previous color only refreshes its
+timestamp. Kept free of Qt like metrics.
+"""
+import array
+import time
+
+
+HISTORY_CAPACITY = 4096  # Samples kept before the oldest are overwritten
+
+
+class SampleHistory:
+    """Ring buffer of packed 0xRRGGBB colors and the time each was seen."""
+
+    def __init__(self, capacity=HISTORY_CAPACITY):
+        self.colors = array.array("I", bytes(4 * capacity))
+        self.times = array.array("d", bytes(8 * capacity))
+        self.next = 0  # Slot for the next sample
+        self.size = 0  # Filled slots, up to capacity
+        self.version = 0  # Bumped on every change, for cheap change polling
+
+    def __len__(self):
+        return self.size
+
+    def record(self, rgb, when=None):
+        """Add a packed color seen at when (time.time() by default)."""
+        when = time.time() if when is None else when
+        capacity = len(self.colors)
+        if self.size and self.colors[self.next - 1] == rgb:
+            # Still on the same color: keep one slot, seen until now
+            self.times[self.next - 1] = when
+            return
+        self.colors[self.next] = rgb
+        self.times[self.next] = when
+        self.next = (self.next + 1) % capacity
+        self.size = min(self.size + 1, capacity)
+        self.version += 1
+
+    def clear(self):
+        self.next = 0
+        self.size = 0
+        self.version += 1
+
+    def recent(self, limit=None):
+        """Yield (rgb, time) pairs, newest first."""
+        capacity = len(self.colors)
+        count = self.size if limit is None else min(limit, self.size)
+        for offset in range(1, count + 1):
+            slot = (self.next - offset) % capacity
+            yield self.colors[slot], self.times[slot]
+
+    def recent_distinct(self, limit):
+        """Return up to limit distinct colors, most recently seen first."""
+        seen = set()
+        colors = []
+        for rgb, _ in self.recent():
+            if rgb not in seen:
+                seen.add(rgb)
+                colors.append(rgb)
+                if len(colors) == limit:
+                    break
+        return colors
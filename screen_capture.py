@@ -0,0 +1,322 @@
+"""Screen geometry, pixel capture and fixed-point monitoring.
+
+Shared by the tray app and the headless "monitor" command, so the command
+gets screen capture without importing the whole GUI. Needs a QApplication
+to exist before the first grab.
+"""
+import logging
+import time
+
+from PyQt5.QtWidgets import QApplication
+from PyQt5.QtGui import QColor, QImage, QPainter
+from PyQt5.QtCore import Qt, QTimer, QRect, QObject, pyqtSignal
+
+import palette_extract
+import region_stats
+from metrics import METRICS
+
+
+MONITOR_FLUSH_INTERVAL_MS = 1000  # How often buffered monitoring samples are written out
+
+
+class ScreenTopology(QObject):
+    """Cached geometry of every screen, rebuilt only when the screens change.
+
+    Looking a point up walks the cached (screen, rect, device pixel ratio)
+    entries starting from the last hit, so the common case of the cursor
+    staying on one monitor is a single rectangle test with no Qt calls.
+    Emits changed after screens are added, removed, moved or rescaled.
+    """
+    changed = pyqtSignal()
+
+    _shared = None
+
+    @classmethod
+    def shared(cls):
+        """Return the topology shared by the whole application."""
+        if cls._shared is None:
+            cls._shared = cls(QApplication.instance())
+        return cls._shared
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.entries = []  # (screen, left, top, right, bottom, device pixel ratio)
+        self.last_hit = None
+        self.virtual_geometry = QRect()
+        app = QApplication.instance()
+        app.screenAdded.connect(self.screenAdded)
+        app.screenRemoved.connect(self.invalidate)
+        for screen in app.screens():
+            self.watch(screen)
+        self.rebuild()
+
+    def watch(self, screen):
+        screen.geometryChanged.connect(self.invalidate)
+        screen.logicalDotsPerInchChanged.connect(self.invalidate)
+        screen.physicalDotsPerInchChanged.connect(self.invalidate)
+
+    def screenAdded(self, screen):
+        self.watch(screen)
+        self.invalidate()
+
+    def invalidate(self, *args):
+        """Rebuild the cache and tell listeners the layout changed."""
+        self.rebuild()
+        logging.info("Screen layout changed: %d screen(s), virtual desktop %dx%d.",
+                     len(self.entries), self.virtual_geometry.width(), self.virtual_geometry.height())
+        self.changed.emit()
+
+    def rebuild(self):
+        self.entries = []
+        self.last_hit = None
+        virtual = QRect()
+        for screen in QApplication.screens():
+            geometry = screen.geometry()
+            self.entries.append((
+                screen, geometry.left(), geometry.top(), geometry.right(), geometry.bottom(),
+                screen.devicePixelRatio(),
+            ))
+            virtual = virtual.united(geometry)
+        self.virtual_geometry = virtual
+
+    def entry_at(self, x, y):
+        """Return the cached entry of the screen holding global (x, y), or None."""
+        entry = self.last_hit
+        if entry is not None and entry[1] <= x <= entry[3] and entry[2] <= y <= entry[4]:
+            return entry
+        for entry in self.entries:
+            if entry[1] <= x <= entry[3] and entry[2] <= y <= entry[4]:
+                self.last_hit = entry
+                return entry
+        return None
+
+
+class ScreenCapture:
+    """Grab small screen regions around a point into reused image buffers."""
+
+    def __init__(self, radius=0, topology=None):
+        self.radius = radius
+        self.topology = topology  # Defaults to the shared ScreenTopology on first grab
+        self._buffers = {}  # Side length in device pixels -> QImage
+        self.valid_rect = QRect()  # Part of the last buffer that holds screen pixels
+
+    def _buffer(self, side):
+        """Return the preallocated buffer for a square of the given side."""
+        buffer = self._buffers.get(side)
+        if buffer is None:
+            buffer = QImage(side, side, QImage.Format_RGB32)
+            self._buffers[side] = buffer
+        return buffer
+
+    def grab(self, x, y, radius=None):
+        """Capture the square around global (x, y).
+
+        Returns (image, center) where center is the device-pixel index of the
+        cursor pixel in both directions, or None if the point is off-screen.
+        The returned image is reused by the next grab of the same size.
+        """
+        if radius is None:
+            radius = self.radius
+        if self.topology is None:
+            self.topology = ScreenTopology.shared()
+        entry = self.topology.entry_at(x, y)
+        if entry is None:
+            return None
+        screen, screen_left, screen_top, screen_right, screen_bottom, screen_ratio = entry
+        width = screen_right - screen_left + 1
+        height = screen_bottom - screen_top + 1
+        relative_x = x - screen_left
+        relative_y = y - screen_top
+
+        # Clamp the requested square to the screen
+        left = max(relative_x - radius, 0)
+        top = max(relative_y - radius, 0)
+        right = min(relative_x + radius, width - 1)
+        bottom = min(relative_y + radius, height - 1)
+
+        started = METRICS.start()
+        pixmap = self.grab_pixmap(screen, left, top, right - left + 1, bottom - top + 1)
+        METRICS.stop("capture.grab", started)
+        # The grabbed pixmap knows its scale; a failed grab falls back to the screen's
+        ratio = screen_ratio if pixmap.isNull() else pixmap.devicePixelRatio()
+        side = max(int(round((2 * radius + 1) * ratio)), 1)
+        buffer = self._buffer(side)
+        if pixmap.isNull():
+            # Nothing captured; report black like a failed full-screen grab did
+            buffer.fill(Qt.black)
+            self.valid_rect = QRect(0, 0, side, side)
+            return buffer, int(radius * ratio)
+        clipped = (right - left) < 2 * radius or (bottom - top) < 2 * radius
+        if clipped:
+            buffer.fill(Qt.black)
+
+        # Copy device pixels 1:1 so the buffer is never rescaled
+        started = METRICS.start()
+        pixmap.setDevicePixelRatio(1.0)
+        offset_x = int(round((left - relative_x + radius) * ratio))
+        offset_y = int(round((top - relative_y + radius) * ratio))
+        painter = QPainter(buffer)
+        painter.setCompositionMode(QPainter.CompositionMode_Source)
+        painter.drawPixmap(offset_x, offset_y, pixmap)
+        painter.end()
+        METRICS.stop("capture.copy", started)
+        self.valid_rect = QRect(offset_x, offset_y, pixmap.width(), pixmap.height()) & buffer.rect()
+        return buffer, int(radius * ratio)
+
+    def grab_pixmap(self, screen, x, y, width, height):
+        """Grab a rectangle of a screen, in screen-relative logical pixels.
+
+        The only place pixels are read from the screen; benchmarks override
+        it to supply a fake screen.
+        """
+        return screen.grabWindow(0, x, y, width, height)
+
+    def grab_rect(self, rect):
+        """Capture a global rectangle as a Format_RGB32 QImage, or None.
+
+        The rectangle is clipped to the screen holding its top-left corner.
+        """
+        if self.topology is None:
+            self.topology = ScreenTopology.shared()
+        entry = self.topology.entry_at(rect.left(), rect.top())
+        if entry is None:
+            return None
+        screen, screen_left, screen_top, screen_right, screen_bottom = entry[:5]
+        rect = rect & QRect(screen_left, screen_top,
+                            screen_right - screen_left + 1, screen_bottom - screen_top + 1)
+        if rect.isEmpty():
+            return None
+        started = METRICS.start()
+        pixmap = self.grab_pixmap(screen, rect.left() - screen_left, rect.top() - screen_top,
+                                  rect.width(), rect.height())
+        METRICS.stop("capture.grab", started)
+        if pixmap.isNull():
+            return None
+        image = pixmap.toImage()
+        if image.format() != QImage.Format_RGB32:
+            image = image.convertToFormat(QImage.Format_RGB32)
+        return image
+
+    def region_statistics(self, rect):
+        """Return region_stats statistics of a global rectangle, or None."""
+        image = self.grab_rect(rect)
+        if image is None:
+            return None
+        started = METRICS.start()
+        # A view on the image's memory; image stays alive until we return
+        statistics = region_stats.region_statistics(palette_extract.image_to_array(image))
+        METRICS.stop("capture.region_stats", started)
+        return statistics
+
+    def sample_points(self, points):
+        """Return the packed color at each global (x, y), or None if off-screen.
+
+        Points on the same screen are read from one grab of their bounding
+        rectangle, so the cost follows the area covered, not the point count.
+        """
+        if self.topology is None:
+            self.topology = ScreenTopology.shared()
+        groups = {}
+        colors = [None] * len(points)
+        for position, (x, y) in enumerate(points):
+            entry = self.topology.entry_at(x, y)
+            if entry is not None:
+                groups.setdefault(id(entry[0]), []).append(position)
+        for positions in groups.values():
+            xs = [points[position][0] for position in positions]
+            ys = [points[position][1] for position in positions]
+            left, top = min(xs), min(ys)
+            image = self.grab_rect(QRect(left, top, max(xs) - left + 1, max(ys) - top + 1))
+            if image is None:
+                continue
+            ratio = image.devicePixelRatio()
+            width, height = image.width(), image.height()
+            for position in positions:
+                x, y = points[position]
+                col = min(int((x - left) * ratio), width - 1)
+                row = min(int((y - top) * ratio), height - 1)
+                colors[position] = image.pixel(col, row) & 0xFFFFFF
+        return colors
+
+    def region_statistics_at(self, x, y, radius):
+        """Return region_stats statistics of the square around global (x, y), or None."""
+        grabbed = self.grab(x, y, radius)
+        if grabbed is None:
+            return None
+        rect = self.valid_rect
+        pixels = palette_extract.image_to_array(grabbed[0])
+        return region_stats.region_statistics(
+            pixels[rect.top():rect.bottom() + 1, rect.left():rect.right() + 1])
+
+    def pixel_at(self, x, y):
+        """Return the QColor at global (x, y), or None if off-screen."""
+        grabbed = self.grab(x, y, 0)
+        if grabbed is None:
+            return None
+        image, center = grabbed
+        return QColor(image.pixel(center, center))
+
+    def average_at(self, x, y, radius):
+        """Return the mean QColor of the on-screen square around global (x, y)."""
+        grabbed = self.grab(x, y, radius)
+        if grabbed is None:
+            return None
+        image = grabbed[0]
+        rect = self.valid_rect
+        count = rect.width() * rect.height()
+        if count == 0:
+            return None
+        red = green = blue = 0
+        for row in range(rect.top(), rect.bottom() + 1):
+            for col in range(rect.left(), rect.right() + 1):
+                rgb = image.pixel(col, row)
+                red += (rgb >> 16) & 0xFF
+                green += (rgb >> 8) & 0xFF
+                blue += rgb & 0xFF
+        return QColor(red // count, green // count, blue // count)
+
+
+class ScreenMonitor(QObject):
+    """Sample a fixed set of points at a steady rate into a SampleLog.
+
+    Every tick reads all points through ScreenCapture.sample_points, so the
+    points on one screen share a single grab of their bounding rectangle.
+    Samples are handed straight to the log; nothing accumulates in memory.
+    """
+
+    def __init__(self, points, rate, log, capture=None, parent=None):
+        super().__init__(parent)
+        if not rate > 0:
+            raise ValueError(f"Monitor rate must be positive, got {rate}")
+        self.points = [tuple(point) for point in points]
+        self.log = log
+        self.capture = capture or ScreenCapture()
+        self.ticks = 0
+        self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.PreciseTimer)
+        self.timer.setInterval(max(int(round(1000 / rate)), 1))
+        self.timer.timeout.connect(self.tick)
+        self.flushTimer = QTimer(self)
+        self.flushTimer.timeout.connect(self.log.flush)
+
+    def start(self):
+        self.timer.start()
+        self.flushTimer.start(MONITOR_FLUSH_INTERVAL_MS)
+        logging.info("Monitoring %d points every %d ms into %s.",
+                     len(self.points), self.timer.interval(), self.log.path)
+
+    def stop(self):
+        self.timer.stop()
+        self.flushTimer.stop()
+        self.log.flush()
+        logging.info("Monitoring stopped after %d samples.", self.ticks)
+
+    def tick(self):
+        started = METRICS.start()
+        try:
+            self.log.write(time.time(), self.capture.sample_points(self.points))
+            self.ticks += 1
+        except Exception as e:
+            logging.error("Error sampling monitored points: %s", str(e))
+        finally:
+            METRICS.stop("monitor.tick", started)